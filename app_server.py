@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+from functools import partial
+
+from app_service import AppService, ServiceError, Session
+
+# Newline-delimited JSON over TCP. Each request is one line:
+#   {"id": 1, "op": "login", "args": {"username": "bob", "password": "..."}}
+# and gets one response line:
+#   {"id": 1, "ok": true, "result": {...}}  or  {"id": 1, "ok": false, "error": "..."}
+# Every connection is its own session.
+OPERATIONS = {
+    "register", "login", "logout",
+    "search", "ranked_search", "browse", "add_movie",
+    "todo_add", "todo_list", "todo_complete", "todo_next",
+    "calculate", "guess_start", "guess", "history",
+}
+# Password hashing, index builds, file locks and fsyncs would stall every
+# session, so these run on worker threads off the event loop; the rest only
+# touch the session or queue a log line
+THREADED_OPERATIONS = {
+    "register", "login",
+    "search", "ranked_search", "browse", "add_movie",
+    "todo_add", "todo_list", "todo_complete", "todo_next", "history",
+}
+MAX_LINE = 64 * 1024
+
+
+async def dispatch(service, session, line):
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        op = request.get("op")
+        args = request.get("args") or {}
+    except (ValueError, AttributeError):
+        return {"id": None, "ok": False, "error": "Malformed request."}
+
+    if op not in OPERATIONS:
+        return {"id": request_id, "ok": False, "error": f"Unknown operation: {op}"}
+
+    try:
+        call = partial(getattr(service, op), session, **args)
+        if op in THREADED_OPERATIONS:
+            result = await asyncio.get_running_loop().run_in_executor(None, call)
+        else:
+            result = call()
+    except ServiceError as e:
+        return {"id": request_id, "ok": False, "error": str(e)}
+    except (TypeError, ValueError, AttributeError) as e:
+        return {"id": request_id, "ok": False, "error": f"Bad arguments: {e}"}
+    except OSError as e:
+        return {"id": request_id, "ok": False, "error": f"Storage error: {e}"}
+    except Exception as e:
+        # Never let one request take down the connection
+        return {"id": request_id, "ok": False, "error": f"Internal error: {type(e).__name__}: {e}"}
+    return {"id": request_id, "ok": True, "result": result}
+
+
+async def handle_client(service, reader, writer):
+    session = Session()
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                break  # line longer than MAX_LINE
+            if not line:
+                break
+            response = await dispatch(service, session, line)
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        if session.username is not None:
+            service.logout(session)
+        writer.close()
+
+
+async def serve(host, port):
+    service = AppService()
+    server = await asyncio.start_server(
+        partial(handle_client, service), host, port, limit=MAX_LINE, backlog=1024,
+    )
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the main menu apps over TCP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    options = parser.parse_args()
+    try:
+        asyncio.run(serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
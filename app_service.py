@@ -0,0 +1,174 @@
+import random
+from datetime import datetime
+
+import main
+from calc_batch import ALIASES, ERROR_TEXT, OPERATIONS, SQUARE_ROOT, calculate
+from storage import LOG_KINDS
+
+MAX_GUESSES = 10
+
+
+class ServiceError(Exception):
+    pass
+
+
+# Per-client state: who is signed in and the guessing game in progress
+class Session:
+    def __init__(self):
+        self.username = None
+        self.secret = None
+        self.attempts = 0
+
+
+# Non-interactive API over the apps in main.py. The shared state (movie catalog
+# and indexes, credentials, to-do stores, log writer) lives in main's globals and
+# is loaded once per process; each client only carries a Session. The search
+# indexes are built up front so no request pays for the first build. Catalog
+# reads first pick up movies other processes appended (one stat if none).
+class AppService:
+    def __init__(self):
+        main.load_movies_from_file()
+        main.ensure_movie_index()
+        main.ensure_browse_index()
+
+    def _user(self, session):
+        if session.username is None:
+            raise ServiceError("Not logged in.")
+        return session.username
+
+    # Usernames become folder names under user_logs, so keep them plain
+    def _check_username(self, username):
+        if not username or username in (".", "..") or any(c in username for c in ",/\\\n\r\0"):
+            raise ServiceError("Invalid username.")
+
+    # --- Accounts ---
+
+    def register(self, session, username, password):
+        self._check_username(username)
+        if not main.create_account(username, password):
+            raise ServiceError("Username already taken.")
+        session.username = username
+        return {"username": username}
+
+    def login(self, session, username, password):
+        self._check_username(username)
+        if not main.authenticate(username, password):
+            raise ServiceError("Invalid username or password.")
+        session.username = username
+        return {"username": username}
+
+    def logout(self, session):
+        username = self._user(session)
+        main.log_user_interaction(username, f"User {username} logged out.")
+        session.username = None
+        session.secret = None
+        return {}
+
+    # --- Netflix ---
+
+    def search(self, session, query):
+        username = self._user(session)
+        main.load_movies_from_file()
+        results = main.cached_search_movie(query)
+        main.log_search_to_file(username, query, results)
+        return results
+
+    def ranked_search(self, session, query, k=10, genre=None, year_min=None, year_max=None):
+        username = self._user(session)
+        main.load_movies_from_file()
+        ranked = main.ranked_movies(query, k, genre, year_min, year_max)
+        main.log_search_to_file(username, query, [movie for _, _, movie in ranked])
+        return [dict(movie, id=movie_id, score=score) for score, movie_id, movie in ranked]
+
+    def browse(self, session, genre=None, year_min=None, year_max=None, offset=0, limit=20):
+        self._user(session)
+        main.load_movies_from_file()
+        return [dict(movie, id=movie_id)
+                for movie_id, movie in main.browse_movies(genre, year_min, year_max, offset, limit)]
+
+    def add_movie(self, session, name, genre, year):
+        self._user(session)
+        try:
+            return {"id": main.add_movie_record(name, genre, int(year))}
+        except ValueError as e:
+            raise ServiceError(str(e))
+
+    # --- To-do list ---
+
+    def todo_add(self, session, task, deadline):
+        username = self._user(session)
+        return {"id": main.log_todo_list_task(username, task, deadline)}
+
+    def todo_list(self, session):
+        store = main.get_todo_store(self._user(session))
+        return [{"id": task_id, "task": task, "deadline": deadline} for task_id, task, deadline in store.list()]
+
+    def todo_complete(self, session, task_id):
+        store = main.get_todo_store(self._user(session))
+        try:
+            task, deadline = store.complete(task_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        except KeyError:
+            raise ServiceError("Invalid task number.")
+        return {"id": task_id, "task": task, "deadline": deadline}
+
+    def todo_next(self, session):
+        next_task = main.get_todo_store(self._user(session)).next_due()
+        if next_task is None:
+            return None
+        task_id, task, deadline = next_task
+        return {"id": task_id, "task": task, "deadline": deadline}
+
+    # --- Calculator ---
+
+    def calculate(self, session, operation, num1, num2=None):
+        username = self._user(session)
+        code = ALIASES.get(str(operation).lower())
+        if code is None:
+            raise ServiceError(f"Unknown operation: {operation}")
+        if code != SQUARE_ROOT and num2 is None:
+            raise ServiceError("This operation needs two numbers.")
+
+        num1 = float(num1)
+        num2 = float(num2) if code != SQUARE_ROOT else "N/A"
+        result, error = calculate(code, num1, 0.0 if code == SQUARE_ROOT else num2)
+        shown = ERROR_TEXT[error] if error else result
+        main.log_calculation_to_file(username, OPERATIONS[code], num1, num2, shown)
+        return {"result": None if error else result, "error": ERROR_TEXT.get(error)}
+
+    # --- History ---
+
+    # The user's own log lines of one kind: the last `last` of them, or those
+    # between start and end ("YYYY-mm-dd HH:MM:SS")
+    def history(self, session, kind, last=None, start=None, end=None):
+        username = self._user(session)
+        if kind not in LOG_KINDS:
+            raise ServiceError(f"Unknown log: {kind}")
+        if last is not None:
+            return main.storage.log_tail(username, kind, max(int(last), 0))
+        return main.storage.log_between(username, kind, start, end)
+
+    # --- Number guessing game ---
+
+    def guess_start(self, session):
+        self._user(session)
+        session.secret = random.randint(1, 100)
+        session.attempts = 0
+        return {"attempts_left": MAX_GUESSES}
+
+    def guess(self, session, number):
+        username = self._user(session)
+        if session.secret is None:
+            raise ServiceError("No game in progress.")
+
+        session.attempts += 1
+        outcome = main.check_guess(session.secret, int(number))
+        reply = {"outcome": outcome, "attempts": session.attempts, "finished": False}
+        if outcome == "correct":
+            main.log_number_guessing_result(username, session.attempts, "Win", session.secret)
+            reply["finished"] = True
+        elif session.attempts >= MAX_GUESSES:
+            main.log_number_guessing_result(username, session.attempts, "Loss", session.secret)
+            reply.update(finished=True, number=session.secret)
+        if reply["finished"]:
+            session.secret = None
+        return reply
@@ -0,0 +1,25 @@
+import random
+import sys
+
+from bench_search import make_catalog
+from movie_catalog import dict_footprint
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def run(size, rng):
+    catalog = make_catalog(size, rng)
+    movies = {movie_id: movie_info for movie_id, movie_info in catalog.items()}
+
+    columnar = catalog.memory_footprint()
+    dicts = dict_footprint(movies)
+    print(f"{size:>9} titles | dict {dicts / size:7.1f} B/title"
+          f" | columnar {columnar / size:7.1f} B/title"
+          f" | saved {100 * (1 - columnar / dicts):5.1f}%")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    rng = random.Random(42)
+    for size in sizes:
+        run(size, rng)
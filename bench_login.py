@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from credentials import CredentialStore, hash_password
+
+USERS = 100_000
+LOGINS = 200
+# Bench cost; production uses credentials.KDF_ITERATIONS
+ITERATIONS = 1_000
+
+
+# The original login check: read and split every line of the file
+def linear_login(path, username, password):
+    with open(path, "r") as f:
+        for line in f.readlines():
+            stored_username, stored_password = line.strip().split(',')
+            if username == stored_username and password == stored_password:
+                return True
+    return False
+
+
+def run(users, iterations):
+    rng = random.Random(7)
+    folder = tempfile.mkdtemp()
+    plain_path = os.path.join(folder, "plain_credentials.txt")
+    hashed_path = os.path.join(folder, "user_credentials.txt")
+
+    # One shared salt keeps setup fast; the per-login cost is unchanged
+    salt = os.urandom(16)
+    with open(plain_path, "w") as plain, open(hashed_path, "w") as hashed:
+        for i in range(users):
+            plain.write(f"user{i},pass{i}\n")
+            hashed.write(f"user{i},{hash_password(f'pass{i}', iterations, salt)}\n")
+
+    sample = [rng.randrange(users) for _ in range(LOGINS)]
+
+    start = time.perf_counter()
+    for i in sample:
+        assert linear_login(plain_path, f"user{i}", f"pass{i}")
+    linear_rate = LOGINS / (time.perf_counter() - start)
+
+    store = CredentialStore(hashed_path, iterations)
+    start = time.perf_counter()
+    store.load()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in sample:
+        assert store.verify(f"user{i}", f"pass{i}")
+    indexed_rate = LOGINS / (time.perf_counter() - start)
+
+    print(f"{users} users | KDF iterations {iterations}")
+    print(f"  linear scan, plaintext : {linear_rate:10.1f} logins/s")
+    print(f"  hash index, salted KDF : {indexed_rate:10.1f} logins/s (one-time load {load_time:.2f}s)")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else USERS
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else ITERATIONS
+    run(users, iterations)
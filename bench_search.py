@@ -0,0 +1,126 @@
+import random
+import sys
+import time
+
+import main
+from movie_catalog import MovieCatalog
+from movie_index import TrigramIndex
+from movie_search import ranked_search
+
+WORDS = [
+    "the", "last", "dark", "night", "love", "city", "dead", "secret", "lost", "house",
+    "star", "war", "blood", "river", "king", "queen", "ghost", "storm", "summer", "winter",
+    "dream", "fire", "ice", "shadow", "hunter", "island", "road", "heart", "stone", "wild",
+]
+SYLLABLES = [
+    "an", "ba", "cor", "da", "el", "fa", "gor", "ha", "in", "jo", "ka", "lo", "ma", "ne", "or", "pa",
+    "qui", "ra", "sa", "ta", "ul", "va", "wen", "xi", "yo", "zu", "ber", "cha", "dri", "est", "fin", "gla",
+]
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi", "Thriller", "Documentary"]
+SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = 200
+
+
+# Build a synthetic catalog of the given size. With only WORDS, every common
+# trigram is shared by a large share of all titles, a worst case for ranking.
+# Pass a vocabulary (words, cumulative weights) to draw words from it instead.
+def make_catalog(size, rng, vocabulary=None):
+    movies = MovieCatalog()
+    for movie_id in range(1, size + 1):
+        if vocabulary is None:
+            words = rng.sample(WORDS, rng.randint(1, 4))
+        else:
+            words = rng.choices(vocabulary[0], cum_weights=vocabulary[1], k=rng.randint(1, 4))
+        name = " ".join(words).title() + f" {rng.randint(1, 9999)}"
+        movies.add(movie_id, name, rng.choice(GENRES), rng.randint(1950, 2024))
+    return movies
+
+
+# A title-like vocabulary: size made-up words with Zipf frequencies (the word
+# of rank r is drawn in proportion to 1/r), so a few words are common and most
+# are rare, as in real titles. Returns (words, cumulative weights).
+def make_vocabulary(rng, size=20_000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))))
+    words = sorted(words)
+    rng.shuffle(words)
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, size + 1):
+        total += 1.0 / rank
+        cum_weights.append(total)
+    return words, cum_weights
+
+
+# Pick substring queries from real titles plus a few misses
+def make_queries(movies, rng):
+    names = [movie_info["name"] for movie_info in movies.values()]
+    queries = []
+    for _ in range(QUERIES):
+        name = rng.choice(names)
+        start = rng.randint(0, max(0, len(name) - 4))
+        queries.append(name[start:start + rng.randint(3, 10)])
+    queries += ["zzqx", "no such film"]
+    return queries
+
+
+# The original full-scan search, kept here as the baseline
+def linear_search(movies, movie_name):
+    movie_name = movie_name.lower()
+    return [movie_info for movie_info in movies.values() if movie_name in movie_info["name"].lower()]
+
+
+# Mean ranked top-10 time per query in milliseconds
+def time_ranked(movies, index, queries, **filters):
+    start = time.perf_counter()
+    for query in queries:
+        ranked_search(movies, index, query, 10, **filters)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run(size, rng):
+    movies = make_catalog(size, rng)
+    queries = make_queries(movies, rng)
+
+    start = time.perf_counter()
+    main.netflix_movies = movies
+    main.movie_index.build(movies)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear_results = [linear_search(movies, query) for query in queries]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index_results = [main.search_movie(query) for query in queries]
+    index_time = time.perf_counter() - start
+
+    if linear_results != index_results:
+        raise SystemExit(f"Result mismatch at {size} titles")
+
+    ranked_time = time_ranked(movies, main.movie_index, queries)
+
+    print(f"{size:>9} titles | build {build_time:7.2f}s"
+          f" | linear {linear_time / len(queries) * 1000:8.3f} ms/query"
+          f" | index {index_time / len(queries) * 1000:8.3f} ms/query"
+          f" | speedup {linear_time / index_time:6.1f}x"
+          f" | ranked top-10 {ranked_time:8.3f} ms/query")
+
+    # Ranking again over titles drawn from a Zipf vocabulary, where posting
+    # lists are as skewed as in a real catalog
+    movies = make_catalog(size, rng, make_vocabulary(rng))
+    index = TrigramIndex()
+    index.build(movies)
+    queries = make_queries(movies, rng)
+    filters = {"genre": GENRES[0], "year_min": 1990, "year_max": 2010}
+    print(f"{size:>9} titles, Zipf vocabulary"
+          f" | ranked top-10 {time_ranked(movies, index, queries):8.3f} ms/query"
+          f" | with genre and years {time_ranked(movies, index, queries, **filters):8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    rng = random.Random(42)
+    for size in sizes:
+        run(size, rng)
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Median wall time allowed per scenario, in milliseconds
+BUDGET_MS = {
+    "import main": 120,
+    "launch and exit": 150,
+    "calculator session": 250,
+}
+# Modules a calculator-only session should never load
+HEAVY_MODULES = ("numpy", "concurrent.futures.process")
+
+# Scripted stdin for each scenario: the start screen's Exit, and a login that
+# does one addition in the calculator, then logs out and exits
+SCRIPTS = {
+    "launch and exit": "3\n",
+    "calculator session": "1\nbench\npassword\n1\n1\n2\n3\n8\n5\n3\n",
+}
+REGISTER = "2\nbench\npassword\n5\n3\n"
+CALCULATOR_PROBE = (
+    "import sys, main\n"
+    "main.calculate(0, 2.0, 3.0)\n"
+    "main.log_calculation_to_file('bench', 'Addition', 2.0, 3.0, 5.0)\n"
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+)
+
+
+def run_once(command, workdir, env, stdin=""):
+    start = time.perf_counter()
+    subprocess.run(command, cwd=workdir, env=env, input=stdin, text=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+# Time every scenario in fresh processes against one data folder. Password
+# hashing is turned down so the numbers show startup, not the KDF.
+def run(options):
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, PYTHONPATH=HERE, KDF_ITERATIONS=str(options.kdf_iterations))
+    main_py = os.path.join(HERE, "main.py")
+    subprocess.run([sys.executable, main_py], cwd=workdir, env=env, input=REGISTER, text=True,
+                   stdout=subprocess.DEVNULL, check=True)
+
+    commands = {
+        "import main": ([sys.executable, "-c", "import main"], ""),
+        "launch and exit": ([sys.executable, main_py], SCRIPTS["launch and exit"]),
+        "calculator session": ([sys.executable, main_py], SCRIPTS["calculator session"]),
+    }
+    baseline = [run_once([sys.executable, "-c", "pass"], workdir, env) for _ in range(options.runs)]
+    results = {}
+    for name, (command, stdin) in commands.items():
+        run_once(command, workdir, env, stdin)  # warm the bytecode cache
+        samples = sorted(run_once(command, workdir, env, stdin) for _ in range(options.runs))
+        results[name] = {
+            "min_ms": samples[0],
+            "median_ms": statistics.median(samples),
+            "p95_ms": statistics.quantiles(samples, n=20)[18] if len(samples) > 1 else samples[0],
+            "budget_ms": BUDGET_MS[name],
+        }
+
+    probe = subprocess.run([sys.executable, "-c", CALCULATOR_PROBE], cwd=workdir, env=env,
+                           capture_output=True, text=True, check=True)
+    return {
+        "interpreter_ms": statistics.median(baseline),
+        "scenarios": results,
+        "calculator_loads": [name for name in probe.stdout.strip().split(",") if name],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time app startup in fresh processes against a budget.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--kdf-iterations", type=int, default=1_000)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    options = parser.parse_args()
+
+    report = run(options)
+    over = [name for name, result in report["scenarios"].items() if result["median_ms"] > result["budget_ms"]]
+    if options.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"Bare interpreter: {report['interpreter_ms']:.1f} ms")
+        print(f"{'scenario':<20} {'min':>8} {'median':>8} {'p95':>8} {'budget':>8}")
+        for name, result in report["scenarios"].items():
+            print(f"{name:<20} {result['min_ms']:>8.1f} {result['median_ms']:>8.1f} "
+                  f"{result['p95_ms']:>8.1f} {result['budget_ms']:>8}")
+        loaded = ", ".join(report["calculator_loads"]) or "none"
+        print(f"Heavy modules loaded by the calculator: {loaded}")
+
+    if over or report["calculator_loads"]:
+        for name in over:
+            print(f"OVER BUDGET: {name}")
+        sys.exit(1)
@@ -0,0 +1,128 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_search import make_catalog
+from movie_catalog import MovieCatalog
+from movie_persistence import parse_movie_line
+from smoke_backends import check_backends
+from storage import SEARCH_LOG, USER_LOG, SQLiteBackend, TextFileBackend
+
+# Bench cost; production uses credentials.KDF_ITERATIONS
+ITERATIONS = 1_000
+
+
+def parse_movies(file):
+    movies = MovieCatalog()
+    malformed = 0
+    if file is not None:
+        for idx, raw in enumerate(file):
+            movie = parse_movie_line(raw.decode("utf-8", errors="replace"))
+            if movie is None:
+                malformed += 1
+            else:
+                movies.add(idx + 1, *movie)
+    return movies, malformed
+
+
+def open_backend(name, folder):
+    if name == "sqlite":
+        backend = SQLiteBackend(os.path.join(folder, "app.sqlite3"), ITERATIONS)
+    else:
+        backend = TextFileBackend(
+            os.path.join(folder, "user_credentials.txt"), os.path.join(folder, "user_logs"),
+            os.path.join(folder, "listmovie.txt"), os.path.join(folder, "listmovie.snapshot"), parse_movies,
+        )
+        backend.credentials.iterations = ITERATIONS
+    return backend
+
+
+def timed(results, label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    results[label] = count / elapsed if elapsed else float("inf")
+
+
+def run(name, options, rng):
+    folder = tempfile.mkdtemp(prefix=f"bench_storage_{name}_")
+    backend = open_backend(name, folder)
+    results = {}
+    users = [f"user{i}" for i in range(options.users)]
+
+    def register():
+        for username in users:
+            backend.credentials.register(username, "password")
+            backend.create_user(username)
+    timed(results, "register", len(users), register)
+    timed(results, "login", options.logins,
+          lambda: [backend.credentials.verify(rng.choice(users), "password") for _ in range(options.logins)])
+
+    # Bulk load the catalog in one write, then add movies one at a time
+    seed = make_catalog(options.catalog, rng)
+    manager = backend.catalog
+
+    def bulk_add():
+        with manager.writing():
+            manager.refresh()
+            for movie_id, movie in seed.items():
+                manager.catalog.add(movie_id, movie["name"], movie["genre"], movie["year"])
+            manager.append(list(seed.keys()), sync=True)
+    timed(results, "bulk add movies", len(seed), bulk_add)
+
+    def add_movies():
+        for i in range(options.movies):
+            with manager.writing():
+                manager.refresh()
+                movie_id = manager.next_id()
+                manager.catalog.add(movie_id, f"Bench Movie {i}", "Drama", 2000 + i % 25)
+                manager.append([movie_id])
+    timed(results, "add movie", options.movies, add_movies)
+    backend.close()
+
+    # A fresh process view of the same data: first load, then an unchanged refresh
+    backend = open_backend(name, folder)
+    timed(results, "cold catalog load", len(seed) + options.movies, lambda: backend.catalog.refresh())
+    timed(results, "unchanged refresh", 1000, lambda: [backend.catalog.refresh() for _ in range(1000)])
+
+    stores = [backend.todo_store(username) for username in users[:options.todo_users]]
+    task_ids = []
+    timed(results, "todo add", options.tasks, lambda: task_ids.extend(
+        (store, store.add(f"task {i}", f"2026-{1 + i % 12:02d}-01"))
+        for i, store in ((i, stores[i % len(stores)]) for i in range(options.tasks))))
+    timed(results, "todo list", len(stores) * 10, lambda: [store.list() for store in stores * 10])
+    timed(results, "todo next due", len(stores) * 10, lambda: [store.next_due() for store in stores * 10])
+    completed = task_ids[::2]
+    timed(results, "todo complete", len(completed),
+          lambda: [store.complete(task_id, "2026-10-18 00:00:00") for store, task_id in completed])
+
+    def write_logs():
+        for i in range(options.logs):
+            username = users[i % len(users)]
+            backend.write_log(username, USER_LOG if i % 2 else SEARCH_LOG, f"2026-10-18 00:00:00 - event {i}\n")
+        backend.flush()
+    timed(results, "log write + flush", options.logs, write_logs)
+    backend.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the text-file and SQLite storage backends.")
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--logins", type=int, default=2_000)
+    parser.add_argument("--catalog", type=int, default=200_000, help="movies bulk-loaded before the timed adds")
+    parser.add_argument("--movies", type=int, default=5_000, help="movies added one at a time")
+    parser.add_argument("--todo-users", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--logs", type=int, default=100_000)
+    options = parser.parse_args()
+    # Both backends must work before either is worth timing
+    check_backends()
+
+    results = {name: run(name, options, random.Random(42)) for name in ("text", "sqlite")}
+
+    print(f"{'ops/s':<20} {'text':>12} {'sqlite':>12}")
+    for label in results["text"]:
+        print(f"{label:<20} {results['text'][label]:>12,.0f} {results['sqlite'][label]:>12,.0f}")
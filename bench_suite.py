@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from bench_search import make_catalog, make_queries
+from calc_batch import OPERATIONS, calculate
+from migrate_storage import text_to_sqlite
+from movie_persistence import format_movie_line
+from smoke_backends import check_backends
+from storage import SQLITE
+
+# Flag a regression when p95 latency grows or throughput drops by more than this
+REGRESSION_THRESHOLD = 0.10
+
+
+# Reset the process's peak RSS so the next reading covers one phase only.
+# Linux allows this through clear_refs; returns False where it is not possible.
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+# Time count calls of operation(i) and summarize latency, throughput and memory.
+# peak_rss_kb is the phase's own peak where the peak can be reset; elsewhere
+# the process-wide peak never drops, so only its growth in the phase is shown.
+def measure(operation, count):
+    reset = reset_peak_rss()
+    peak_before = 0 if reset else peak_rss_kb()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        begin = time.perf_counter_ns()
+        operation(i)
+        latencies.append((time.perf_counter_ns() - begin) / 1e6)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "count": count,
+        "ops_per_sec": count / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1] if latencies else 0.0,
+        "peak_rss_kb": peak_rss_kb() - peak_before,
+        "rss_scope": "phase peak" if reset else "peak growth",
+    }
+
+
+def run(options):
+    rng = random.Random(options.seed)
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    os.chdir(workdir)
+
+    # main uses paths relative to the working directory, so import it from there
+    import main
+    main.credential_store.iterations = options.kdf_iterations
+
+    catalog = make_catalog(options.catalog, rng)
+    with open(main.MOVIES_FILE, "w") as file:
+        file.writelines(format_movie_line(movie) for movie in catalog.values())
+    if main.storage.name == SQLITE:
+        text_to_sqlite(".", main.STORAGE_DB)
+    queries = make_queries(catalog, rng)
+
+    setup_start = time.perf_counter()
+    main.load_movies_from_file()
+    main.ensure_movie_index()
+    setup = {"catalog_load_s": time.perf_counter() - setup_start}
+
+    existing = [f"user{i}" for i in range(options.users)]
+    for username in existing:
+        main.create_account(username, "password")
+    main.log_writer.flush()
+
+    n = options.ops
+    results = {}
+
+    def phase(name, operation, count=n):
+        results[name] = measure(operation, count)
+        main.log_writer.flush()
+        print(f"{name:<16} {results[name]['ops_per_sec']:>10.1f} ops/s"
+              f"  p50 {results[name]['p50_ms']:8.3f} ms  p95 {results[name]['p95_ms']:8.3f} ms"
+              f"  p99 {results[name]['p99_ms']:8.3f} ms  rss {results[name]['peak_rss_kb'] / 1024:7.1f} MB")
+
+    phase("register", lambda i: main.create_account(f"new{i}", "password"))
+    phase("login", lambda i: main.authenticate(rng.choice(existing), "password"))
+    phase("search_movie", lambda i: main.search_movie(queries[i % len(queries)]))
+    # Popular queries repeat: most lookups go to a small head of the query list
+    popular = queries[:max(1, len(queries) // 20)]
+    phase("cached_search", lambda i: main.cached_search_movie(
+        rng.choice(popular) if rng.random() < 0.8 else rng.choice(queries)))
+    phase("add_movie", lambda i: main.add_movie_record(f"Bench Movie {i}", "Drama", 2000 + i % 25))
+
+    todo_users = existing[:max(1, min(len(existing), 100))]
+    task_ids = []
+    phase("todo_add", lambda i: task_ids.append(
+        (i, main.log_todo_list_task(todo_users[i % len(todo_users)], f"task {i}", f"2026-{1 + i % 12:02d}-01"))))
+    phase("todo_list", lambda i: main.get_todo_store(todo_users[i % len(todo_users)]).list())
+    phase("todo_complete", lambda i: main.get_todo_store(todo_users[task_ids[i][0] % len(todo_users)])
+          .complete(task_ids[i][1], "2026-10-18 00:00:00"))
+
+    def calculator_op(i):
+        code = i % len(OPERATIONS)
+        result, error = calculate(code, float(i), float(i % 7))
+        main.log_calculation_to_file(existing[i % len(existing)], OPERATIONS[code], float(i), float(i % 7), result)
+    phase("calculator", calculator_op)
+
+    phase("guess_logger", lambda i: main.log_number_guessing_result(
+        existing[i % len(existing)], 1 + i % 10, "Win" if i % 3 else "Loss", 1 + i % 100))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "storage": main.storage.name,
+            "catalog": options.catalog,
+            "users": options.users,
+            "ops": options.ops,
+            "kdf_iterations": options.kdf_iterations,
+            "seed": options.seed,
+            "workdir": workdir,
+        },
+        "setup": setup,
+        "search_cache": main.search_cache.stats(),
+        "results": results,
+    }
+
+
+# Print per-operation changes against an earlier run; returns True on regression
+def compare(report, baseline):
+    regressed = False
+    print(f"\nCompared with {baseline['meta']['timestamp']}:")
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        p95_change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+        rate_change = current["ops_per_sec"] / previous["ops_per_sec"] - 1 if previous["ops_per_sec"] else 0.0
+        flag = p95_change > REGRESSION_THRESHOLD or rate_change < -REGRESSION_THRESHOLD
+        regressed |= flag
+        print(f"{name:<16} p95 {p95_change:+7.1%}  ops/s {rate_change:+7.1%}{'  REGRESSION' if flag else ''}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-generation benchmark over every app path.")
+    parser.add_argument("--catalog", type=int, default=100_000, help="synthetic movie titles")
+    parser.add_argument("--users", type=int, default=1_000, help="synthetic registered users")
+    parser.add_argument("--ops", type=int, default=2_000, help="operations per benchmark")
+    parser.add_argument("--kdf-iterations", type=int, default=1_000, help="password hashing cost")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json", help="where to save the JSON report")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    options = parser.parse_args()
+    # Both backends must work before either is worth timing
+    check_backends()
+
+    output = os.path.abspath(options.output)
+    baseline_path = os.path.abspath(options.compare) if options.compare else None
+
+    report = run(options)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if compare(report, baseline):
+            sys.exit(1)
@@ -0,0 +1,141 @@
+import math
+from array import array
+
+from lazy_import import optional_module
+
+# Operation codes, in calculator menu order, with the names used in history
+OPERATIONS = ["Addition", "Subtraction", "Multiplication", "Division", "Power", "Square Root"]
+ADD, SUBTRACT, MULTIPLY, DIVIDE, POWER, SQUARE_ROOT = range(len(OPERATIONS))
+ALIASES = {
+    "+": ADD, "add": ADD, "addition": ADD,
+    "-": SUBTRACT, "sub": SUBTRACT, "subtract": SUBTRACT, "subtraction": SUBTRACT,
+    "*": MULTIPLY, "x": MULTIPLY, "mul": MULTIPLY, "multiply": MULTIPLY, "multiplication": MULTIPLY,
+    "/": DIVIDE, "div": DIVIDE, "divide": DIVIDE, "division": DIVIDE,
+    "^": POWER, "**": POWER, "pow": POWER, "power": POWER,
+    "sqrt": SQUARE_ROOT, "square root": SQUARE_ROOT,
+}
+
+# Error codes; 0 means the result is valid. The texts match the interactive calculator.
+OK, DIVISION_BY_ZERO, NEGATIVE_ROOT, OUT_OF_RANGE = range(4)
+ERROR_TEXT = {
+    DIVISION_BY_ZERO: "Error! Division by zero.",
+    NEGATIVE_ROOT: "Error! Square root of negative number.",
+    OUT_OF_RANGE: "Error! Result out of range.",
+}
+
+
+# Parse "operation,num1[,num2]" lines into parallel code/operand arrays.
+# Returns (codes, a, b, malformed line numbers).
+def parse_operations(lines):
+    codes = array("B")
+    a = array("d")
+    b = array("d")
+    malformed = []
+    for line_number, line in enumerate(lines, start=1):
+        parts = line.split(",")
+        operation = parts[0].strip().lower()
+        if not operation:
+            continue
+        code = ALIASES.get(operation)
+        try:
+            if code is None or len(parts) < (2 if code == SQUARE_ROOT else 3):
+                raise ValueError(line)
+            x = float(parts[1])
+            y = float(parts[2]) if code != SQUARE_ROOT else 0.0
+        except ValueError:
+            malformed.append(line_number)
+            continue
+        codes.append(code)
+        a.append(x)
+        b.append(y)
+    return codes, a, b, malformed
+
+
+# Evaluate every operation in one pass. Invalid operations are flagged in the
+# error array (with NaN results) instead of producing strings.
+def evaluate_batch(codes, a, b):
+    np = optional_module("numpy")
+    if np is None:
+        return _evaluate_python(codes, a, b)
+
+    codes = np.asarray(codes, dtype=np.uint8)
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    results = np.full(len(codes), np.nan)
+    errors = np.zeros(len(codes), dtype=np.uint8)
+
+    with np.errstate(all="ignore"):
+        for code, compute in (
+            (ADD, np.add), (SUBTRACT, np.subtract), (MULTIPLY, np.multiply), (POWER, np.power),
+        ):
+            mask = codes == code
+            results[mask] = compute(a[mask], b[mask])
+
+        mask = codes == DIVIDE
+        zero = mask & (b == 0)
+        errors[zero] = DIVISION_BY_ZERO
+        valid = mask & ~zero
+        results[valid] = a[valid] / b[valid]
+
+        mask = codes == SQUARE_ROOT
+        negative = mask & (a < 0)
+        errors[negative] = NEGATIVE_ROOT
+        valid = mask & ~negative
+        results[valid] = np.sqrt(a[valid])
+
+    # Overflow or complex results (e.g. a negative number to a fractional power)
+    broken = (errors == OK) & ~np.isfinite(results) & np.isfinite(a) & np.isfinite(b)
+    errors[broken] = OUT_OF_RANGE
+    results[errors != OK] = np.nan
+    return results, errors
+
+
+def _evaluate_python(codes, a, b):
+    results = array("d")
+    errors = array("B")
+    for code, x, y in zip(codes, a, b):
+        result, error = calculate(code, x, y)
+        results.append(result)
+        errors.append(error)
+    return results, errors
+
+
+# Evaluate a single operation, returning (result, error code)
+def calculate(code, x, y=0.0):
+    try:
+        if code == ADD:
+            return x + y, OK
+        if code == SUBTRACT:
+            return x - y, OK
+        if code == MULTIPLY:
+            return x * y, OK
+        if code == DIVIDE:
+            if y == 0:
+                return math.nan, DIVISION_BY_ZERO
+            return x / y, OK
+        if code == POWER:
+            result = x ** y
+            if isinstance(result, complex):
+                return math.nan, OUT_OF_RANGE
+            return result, OK
+        if x < 0:
+            return math.nan, NEGATIVE_ROOT
+        return math.sqrt(x), OK
+    except (OverflowError, ZeroDivisionError):
+        return math.nan, OUT_OF_RANGE
+
+
+# calculation_history.txt lines for a batch, joined for a single write.
+# Numbers are formatted column by column with map(repr), which matches the
+# str() of a float used by the interactive calculator.
+def history_text(username, codes, a, b, results, errors):
+    prefixes = [f"{username}: {operation} | " for operation in OPERATIONS]
+    codes = codes.tolist()
+    xs = map(repr, a.tolist())
+    ys = map(repr, b.tolist())
+    shown = [ERROR_TEXT[error] if error else result
+             for error, result in zip(errors.tolist(), map(repr, results.tolist()))]
+    return "".join([
+        f"{prefixes[code]}{x} and {'N/A' if code == SQUARE_ROOT else y} = {result}\n"
+        for code, x, y, result in zip(codes, xs, ys, shown)
+    ])
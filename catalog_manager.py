@@ -0,0 +1,181 @@
+import os
+from contextlib import contextmanager
+
+from file_lock import file_version, locked
+from instrumentation import add_bytes
+from movie_catalog import MovieCatalog
+from movie_persistence import format_movie_line, parse_movie_line
+from movie_snapshot import load_snapshot, write_snapshot
+
+UNCHANGED = "unchanged"
+RELOADED = "reloaded"
+APPENDED = "appended"
+
+
+# Shared owner of the in-memory catalog for listmovie.txt. The file is loaded
+# on the first refresh() (from the mmap snapshot when it is current), and later
+# refreshes only stat() it:
+#   unchanged (same inode, size and mtime)  -> nothing to do
+#   grown in place                          -> parse just the appended bytes
+#   replaced, truncated or edited           -> full reload
+# Every change bumps generation. All state changes happen under the AppendLog's
+# lock, so sessions on several threads and this process's own appends and
+# compactions see one consistent catalog. The file is read under a shared file
+# lock; writers in any process take it exclusively (see file_lock.locked).
+# Changes go through writing(): refresh inside it, then append() or rewrite(),
+# so no other process's lines are skipped.
+# A movie's id is its line number in the file, as a full parse numbers them,
+# so ids read from an appended tail match what a fresh load would assign. A
+# rewrite drops malformed lines, so the catalog is renumbered to match.
+class CatalogManager:
+    def __init__(self, path, snapshot_path, log, parse_file):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.log = log
+        self.lock = log.lock
+        # parse_file(binary file) -> (catalog, malformed lines) for full loads
+        self.parse_file = parse_file
+        self.catalog = MovieCatalog()
+        self.generation = 0
+        self.loaded = False
+        self._state = None   # file_version() of the file as last seen
+        self._offset = 0     # bytes of the file already in the catalog
+        self._lines = 0      # lines in those bytes, malformed and blank ones included
+        log.on_rewrite = self._rewritten
+
+    def _stat(self):
+        return file_version(self.path)
+
+    def is_current(self):
+        return self.loaded and self._stat() == self._state
+
+    # Bring the catalog up to date with the file.
+    # Returns (UNCHANGED | RELOADED | APPENDED, ids added by an append).
+    def refresh(self):
+        if self.is_current():
+            return UNCHANGED, []
+        with self.lock:
+            state = self._stat()
+            if self.loaded and state == self._state:
+                return UNCHANGED, []
+            with locked(self.path, shared=True):
+                state = self._stat()
+                if (self.loaded and state is not None and self._state is not None
+                        and state[0] == self._state[0] and state[1] >= self._offset and self._ends_line()):
+                    added_ids = self._read_tail(state)
+                    self.generation += 1
+                    return APPENDED, added_ids
+                self._load(state)
+                self.generation += 1
+                return RELOADED, []
+
+    # The byte before the offset is still a line end, i.e. the loaded part was not rewritten
+    def _ends_line(self):
+        if self._offset == 0:
+            return True
+        with open(self.path, "rb") as file:
+            file.seek(self._offset - 1)
+            return file.read(1) == b"\n"
+
+    def _load(self, state):
+        if self.loaded:
+            self.log.reopen()
+        self.loaded = True
+        self._state = state
+        snapshot = load_snapshot(self.snapshot_path, self.path)
+        if snapshot is not None:
+            self.catalog, malformed = snapshot
+            self._offset = state[1]
+            self._lines = len(self.catalog) + malformed
+            add_bytes("load_movies_from_file", read=os.path.getsize(self.snapshot_path))
+        elif state is None:
+            self.catalog, malformed = self.parse_file(None)
+            self._offset = 0
+            self._lines = 0
+        else:
+            # state was taken before reading, so anything appended meanwhile
+            # shows up as a change and is picked up by the next refresh
+            with open(self.path, "rb") as file:
+                self.catalog, malformed = self.parse_file(file)
+                self._offset = file.tell()
+            # parse_file numbers every line, so each one is a movie or malformed
+            self._lines = len(self.catalog) + malformed
+            if self._offset == state[1]:
+                write_snapshot(self.snapshot_path, self.catalog, self.path, malformed)
+        # Malformed lines are dropped by the next background compaction
+        self.log.garbage_lines = malformed
+
+    # Parse the complete lines appended since the last refresh. A partly
+    # written last line is left for the next refresh.
+    def _read_tail(self, state):
+        with open(self.path, "rb") as file:
+            file.seek(self._offset)
+            data = file.read(state[1] - self._offset)
+        add_bytes("load_movies_from_file", read=len(data))
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        self._state = state
+
+        # Split on b"\n" only, like the full parse, so line numbers agree
+        added_ids = []
+        for raw in data[:end].split(b"\n")[:-1]:
+            movie_id = self.next_id()
+            self._lines += 1
+            movie = parse_movie_line(raw.decode("utf-8", errors="replace"))
+            if movie is None:
+                self.log.garbage_lines += 1
+                continue
+            self.catalog.add(movie_id, *movie)
+            added_ids.append(movie_id)
+        return added_ids
+
+    # Id for the next movie this process appends: its line number once written.
+    # After a compaction the catalog keeps its old ids, which may run past the
+    # line count, so never go below the catalog's own next id.
+    def next_id(self):
+        return max(self._lines + 1, self.catalog.next_id())
+
+    # Hold the thread and file locks for a catch-up followed by a write
+    @contextmanager
+    def writing(self):
+        with self.lock, locked(self.path):
+            yield
+
+    # Persist movies already added to the catalog (call inside writing())
+    def append(self, movie_ids, sync=False):
+        self.log.append_many([format_movie_line(self.catalog[movie_id]) for movie_id in movie_ids])
+        self._lines += len(movie_ids)
+        if sync:
+            self.log.sync()
+        self.appended()
+
+    # Rewrite the file from the catalog, dropping malformed lines (call inside writing())
+    def rewrite(self):
+        self.log.rewrite([format_movie_line(movie) for movie in self.catalog.values()])
+
+    # Run compact() periodically while the file holds malformed lines
+    def start_compactor(self, interval, compact):
+        self.log.start_compactor(interval, compact)
+
+    def close(self):
+        self.log.close()
+
+    # Record lines this process appended itself (already in the catalog)
+    def appended(self):
+        with self.lock:
+            state = self._stat()
+            self._state = state
+            self._offset = state[1] if state else 0
+            self.generation += 1
+
+    # AppendLog rewrote the file from the catalog: same movies, one per line,
+    # so they take their new line numbers as ids
+    def _rewritten(self):
+        catalog = self.catalog.renumbered()
+        if catalog is not self.catalog:
+            self.catalog = catalog
+            self.generation += 1
+        self._lines = len(self.catalog)
+        state = self._stat()
+        self._state = state
+        self._offset = state[1] if state else 0
@@ -0,0 +1,154 @@
+import hashlib
+import hmac
+import os
+import threading
+
+from file_lock import TailReader, locked
+from movie_persistence import atomic_write_lines
+
+KDF_NAME = "pbkdf2_sha256"
+# PBKDF2 rounds for new and upgraded passwords; raise as hardware gets faster
+KDF_ITERATIONS = int(os.environ.get("KDF_ITERATIONS", 200_000))
+SALT_BYTES = 16
+
+
+# Salted PBKDF2 hash stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>"
+def hash_password(password, iterations=KDF_ITERATIONS, salt=None):
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{KDF_NAME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+# Older files stored passwords as plain text
+def is_hashed(stored):
+    parts = stored.split("$")
+    return len(parts) == 4 and parts[0] == KDF_NAME
+
+
+# Check a password against a stored hash, or a plaintext password from older files
+def verify_password(password, stored):
+    parts = stored.split("$")
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+
+    _, iterations, salt, digest = parts
+    expected = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(expected.hex(), digest)
+
+
+# Plaintext entries and hashes weaker than the current cost get re-hashed on login
+def needs_rehash(stored, iterations=KDF_ITERATIONS):
+    return not is_hashed(stored) or int(stored.split("$")[1]) < iterations
+
+
+# In-memory username index over user_credentials.txt. The file is read once;
+# register appends a line, and the last line for a user wins. Plaintext entries
+# are hashed on the first load and password upgrades replace the user's line, both
+# by rewriting the file with one line per user, so no old password stays in it.
+# Other processes may append to the same file: writes happen under an exclusive
+# file lock after catching up on lines appended since the last read, so two
+# processes cannot register the same name, and an unknown username triggers a
+# catch-up (one stat when nothing changed) before it is rejected.
+class CredentialStore:
+    def __init__(self, path, iterations=KDF_ITERATIONS):
+        self.path = path
+        self.iterations = iterations
+        self.users = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.tail = TailReader(path)
+        # Unknown users are checked against this so they cost as much as real ones
+        self._dummy = None
+
+    def load(self):
+        self.tail = TailReader(self.path)
+        self.users = {}
+        self._catch_up()
+        self.loaded = True
+        # One-time upgrade of an old file: the stored text is the password itself.
+        # Hashing is slow, so it runs before taking the file lock.
+        upgrades = {username: (stored, hash_password(stored, self.iterations))
+                    for username, stored in self.users.items() if not is_hashed(stored)}
+        if upgrades:
+            with locked(self.path):
+                self._catch_up()
+                for username, (stored, upgraded) in upgrades.items():
+                    # Skip users whose password changed elsewhere meanwhile
+                    if self.users.get(username) == stored:
+                        self.users[username] = upgraded
+                self._rewrite()
+
+    # Apply lines appended (by any process) since the last read
+    def _catch_up(self):
+        with locked(self.path, shared=True):
+            reset, lines = self.tail.read_new()
+        if reset:
+            self.users = {}
+        for line in lines:
+            parts = line.split(",", 1)
+            if len(parts) == 2 and parts[0]:
+                self.users[parts[0]] = parts[1]
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self.load()
+
+    def exists(self, username):
+        self._ensure_loaded()
+        if username not in self.users:
+            with self.lock:
+                self._catch_up()
+        return username in self.users
+
+    # Call with self.lock and the exclusive file lock held, after _catch_up()
+    def _append(self, username, stored):
+        with open(self.path, "ab") as f:
+            f.write(f"{username},{stored}\n".encode("utf-8"))
+        self.tail.advance()
+        self.users[username] = stored
+
+    # Replace the file with one line per user (same locking as _append)
+    def _rewrite(self):
+        atomic_write_lines(self.path, [f"{username},{stored}\n" for username, stored in self.users.items()])
+        self.tail.advance()
+
+    def verify(self, username, password):
+        self._ensure_loaded()
+        stored = self.users.get(username)
+        if stored is None:
+            with self.lock:
+                self._catch_up()
+            stored = self.users.get(username)
+        if stored is None:
+            if self._dummy is None:
+                self._dummy = hash_password("", self.iterations)
+            verify_password(password, self._dummy)
+            return False
+        if not verify_password(password, stored):
+            return False
+
+        if needs_rehash(stored, self.iterations):
+            upgraded = hash_password(password, self.iterations)
+            with self.lock, locked(self.path):
+                self._catch_up()
+                # Skip if the password changed elsewhere since it was checked
+                if self.users.get(username) == stored:
+                    self.users[username] = upgraded
+                    self._rewrite()
+        return True
+
+    # Add a new user; returns False when the username is already taken
+    def register(self, username, password):
+        self._ensure_loaded()
+        if username in self.users:
+            return False
+        stored = hash_password(password, self.iterations)
+        with self.lock, locked(self.path):
+            self._catch_up()
+            if username in self.users:
+                return False
+            self._append(username, stored)
+        return True
@@ -0,0 +1,91 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so locking is a no-op there
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+
+_held = threading.local()
+
+
+# Advisory lock shared by every process using the same data directory. The
+# flock is taken on a "<path>.lock" side file rather than on path itself, so
+# atomic temp+rename rewrites of path do not swap the locked inode away.
+# Shared holders don't block each other; an exclusive holder blocks everyone.
+# Re-entering a lock the thread already holds is a no-op, but a thread that
+# holds it shared must not ask for it exclusively (that would deadlock).
+@contextmanager
+def locked(path, shared=False):
+    held = getattr(_held, "paths", None)
+    if held is None:
+        held = _held.paths = {}
+    mode = held.get(path)
+    if mode is not None:
+        if mode == "shared" and not shared:
+            raise RuntimeError(f"Cannot upgrade a shared lock on {path} to exclusive")
+        yield
+        return
+
+    fd = None
+    if fcntl is not None:
+        fd = os.open(path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except OSError:
+            os.close(fd)
+            raise
+    held[path] = "shared" if shared else "exclusive"
+    try:
+        yield
+    finally:
+        del held[path]
+        if fd is not None:
+            os.close(fd)  # releases the flock
+
+
+# (inode, size, mtime) of a file, or None if it does not exist. Any write by
+# any process changes it, so it serves as the file's version number.
+def file_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+# Follows an append-only text file that other processes may also write to.
+# read_new() returns (reset, lines): the complete lines added since the last
+# call, with reset=True when the file was replaced or truncated and the lines
+# are the whole file. A partly written last line waits for the next call.
+class TailReader:
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self.offset = 0
+
+    def read_new(self):
+        version = file_version(self.path)
+        if version == self.version:
+            return False, []
+        reset = (self.version is None or version is None
+                 or version[0] != self.version[0] or version[1] < self.offset)
+        start = 0 if reset else self.offset
+        data = b""
+        if version is not None:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                data = f.read(version[1] - start)
+        end = data.rfind(b"\n") + 1
+        self.offset = start + end
+        self.version = version
+        return reset, data[:end].decode("utf-8", errors="replace").splitlines()
+
+    # Note this process's own appends, made while caught up and holding the
+    # exclusive lock, so they are not read back
+    def advance(self):
+        self.version = file_version(self.path)
+        self.offset = self.version[1] if self.version else 0
@@ -0,0 +1,276 @@
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+# Metrics are collected only when APP_METRICS is set (to anything but "0") before
+# the app starts. When it is off, @timed hands back the undecorated function and
+# the other helpers return immediately, so the hot paths pay nothing.
+ENABLED = os.environ.get("APP_METRICS", "") not in ("", "0")
+# Where to dump the metrics on exit: *.json for JSON, anything else for Prometheus text
+METRICS_FILE = os.environ.get("APP_METRICS_FILE")
+# Username whose sessions get a sampling profile written to their log folder
+PROFILE_USER = os.environ.get("APP_PROFILE")
+
+# Latency histogram upper bounds, in seconds
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+# Call count, latency histogram and I/O volume for one operation
+class Metric:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.calls += 1
+            self.seconds += seconds
+            self.buckets[index] += 1
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": self.seconds,
+            "buckets": {("+Inf" if bound == float("inf") else repr(bound)): count
+                        for bound, count in zip(BUCKETS, self.buckets)},
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def metric(name):
+    found = metrics.get(name)
+    if found is None:
+        with _metrics_lock:
+            found = metrics.setdefault(name, Metric(name))
+    return found
+
+
+# Decorator recording calls, latency and exceptions under name (default: the function name)
+def timed(name=None):
+    def decorate(func):
+        if not ENABLED:
+            return func
+        record = metric(name or func.__name__)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                record.errors += 1
+                raise
+            finally:
+                record.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class _Span:
+    def __init__(self, record):
+        self.record = record
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.record.errors += 1
+        self.record.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+# Context manager form of @timed for timing part of a function
+def span(name):
+    return _Span(metric(name)) if ENABLED else _NO_SPAN
+
+
+# Add to the bytes read/written by an operation
+def add_bytes(name, read=0, written=0):
+    if not ENABLED:
+        return
+    record = metric(name)
+    with record.lock:
+        record.bytes_read += read
+        record.bytes_written += written
+
+
+def reset():
+    with _metrics_lock:
+        metrics.clear()
+
+
+def json_dump():
+    return {name: record.as_dict() for name, record in sorted(metrics.items())}
+
+
+# Prometheus text exposition format (version 0.0.4)
+def prometheus_text():
+    lines = [
+        "# HELP app_calls_total Calls per operation.",
+        "# TYPE app_calls_total counter",
+    ]
+    records = sorted(metrics.items())
+    lines += [f'app_calls_total{{op="{name}"}} {record.calls}' for name, record in records]
+    lines += ["# HELP app_errors_total Calls that raised, per operation.", "# TYPE app_errors_total counter"]
+    lines += [f'app_errors_total{{op="{name}"}} {record.errors}' for name, record in records]
+    lines += ["# HELP app_latency_seconds Operation latency.", "# TYPE app_latency_seconds histogram"]
+    for name, record in records:
+        cumulative = 0
+        for bound, count in zip(BUCKETS, record.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'app_latency_seconds_bucket{{op="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'app_latency_seconds_sum{{op="{name}"}} {record.seconds!r}')
+        lines.append(f'app_latency_seconds_count{{op="{name}"}} {record.calls}')
+    lines += ["# HELP app_bytes_read_total Bytes read per operation.", "# TYPE app_bytes_read_total counter"]
+    lines += [f'app_bytes_read_total{{op="{name}"}} {record.bytes_read}' for name, record in records]
+    lines += ["# HELP app_bytes_written_total Bytes written per operation.", "# TYPE app_bytes_written_total counter"]
+    lines += [f'app_bytes_written_total{{op="{name}"}} {record.bytes_written}' for name, record in records]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    with open(path, "w") as f:
+        if path.endswith(".json"):
+            json.dump(json_dump(), f, indent=2)
+        else:
+            f.write(prometheus_text())
+
+
+if ENABLED and METRICS_FILE:
+    atexit.register(write_metrics, METRICS_FILE)
+
+
+# Statistical profiler for one thread. A background thread reads the target's
+# stack through sys._current_frames() every interval seconds and counts whole
+# stacks, so the profiled code runs untouched (no sys.setprofile hooks).
+class SamplingProfiler:
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    # Top functions by samples spent in them (self) and under them (total)
+    def report(self, top=20):
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+
+        samples = self.samples or 1
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms", "", "  self%  total%  function"]
+        for function, count in own.most_common(top):
+            lines.append(f"{100 * count / samples:6.1f}  {100 * total[function] / samples:6.1f}  {function}")
+        return "\n".join(lines) + "\n"
+
+    # Folded stacks ("outer;inner count"), the input format of flame graph tools
+    def folded(self):
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items())
+
+
+class _NoProfile:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+# Profile the calling thread while a user's session runs, if that user was
+# picked with APP_PROFILE. The report and folded stacks go to folder.
+def profile_session(username, folder):
+    if PROFILE_USER is None or username != PROFILE_USER:
+        return _NoProfile()
+    return _SessionProfile(folder)
+
+
+class _SessionProfile:
+    def __init__(self, folder):
+        self.folder = folder
+        self.profiler = SamplingProfiler()
+
+    def __enter__(self):
+        return self.profiler.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.stop()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.makedirs(self.folder, exist_ok=True)
+        base = os.path.join(self.folder, f"profile-{stamp}")
+        with open(base + ".txt", "w") as f:
+            f.write(self.profiler.report())
+        with open(base + ".folded", "w") as f:
+            f.write(self.profiler.folded())
+        return False
@@ -0,0 +1,13 @@
+import importlib
+from functools import lru_cache
+
+
+# Import an optional dependency the first time it is needed, or None when it is
+# not installed. Keeps heavy modules such as numpy out of startup for sessions
+# that never use them.
+@lru_cache(maxsize=None)
+def optional_module(name):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
@@ -0,0 +1,339 @@
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from file_lock import file_version, locked
+from log_rotation import segments
+from movie_persistence import atomic_write_lines
+from sketches import HyperLogLog, TopK
+from storage import GUESS_LOG, SEARCH_LOG, SQLITE, TEXT
+
+STATE_VERSION = 1
+STATE_FILE = "log_analytics.json"
+LOGS_FOLDER = "user_logs"
+# Heavy-hitter candidates kept per sketch; reports show at most this many
+TOP_CAPACITY = 1000
+# Distinct queries counted exactly before they are folded into the sketches
+PENDING_QUERIES = 50_000
+KINDS = (GUESS_LOG, SEARCH_LOG)
+
+_GAME = re.compile(r"Game Result: (\w+) \| Number: (\d+) \| Attempts: (\d+)")
+_SEARCH = re.compile(r"Search Query: (.*?) - (?:(Movie not found)|Found: )")
+
+
+# Rollups over the guessing and search logs. Game counts are exact; queries
+# go into Count-Min heavy hitters (all searches and misses) and a HyperLogLog
+# of distinct queries, so the state stays the same size however long the
+# history. Queries are counted exactly in a small dict first and folded into
+# the sketches in bulk, so each distinct query is hashed once per batch.
+# Partial rollups from workers merge into the saved one.
+class Rollup:
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.win_attempts = 0
+        self.attempts = {}
+        self.players = 0
+        self.searches = 0
+        self.misses = 0
+        self.queries = TopK(TOP_CAPACITY)
+        self.missed_queries = TopK(TOP_CAPACITY)
+        self.distinct_queries = HyperLogLog()
+        self.searchers = 0
+        self._pending = {}
+
+    def add_game(self, line):
+        match = _GAME.search(line)
+        if match is None:
+            return
+        result, _, attempts = match.groups()
+        self.games += 1
+        self.attempts[attempts] = self.attempts.get(attempts, 0) + 1
+        if result == "Win":
+            self.wins += 1
+            self.win_attempts += int(attempts)
+
+    # A search with several results is logged as consecutive lines for the same
+    # query, so a line only starts a new search when its query differs from the
+    # previous line's; returns the query for the next call
+    def add_search(self, line, previous):
+        match = _SEARCH.match(line)
+        if match is None:
+            return previous
+        query, missed = match.groups()
+        if missed is None and query == previous:
+            return query
+        key = query.strip().lower()
+        self.searches += 1
+        counts = self._pending.get(key)
+        if counts is None:
+            if len(self._pending) >= PENDING_QUERIES:
+                self.fold()
+            counts = self._pending[key] = [0, 0]
+        counts[0] += 1
+        if missed:
+            self.misses += 1
+            counts[1] += 1
+            return None
+        return query
+
+    # Move the exact pending counts into the sketches
+    def fold(self):
+        for key, (searches, misses) in self._pending.items():
+            self.queries.add(key, searches)
+            self.distinct_queries.add(key)
+            if misses:
+                self.missed_queries.add(key, misses)
+        self._pending = {}
+
+    def merge(self, other):
+        self.fold()
+        other.fold()
+        self.games += other.games
+        self.wins += other.wins
+        self.win_attempts += other.win_attempts
+        for attempts, count in other.attempts.items():
+            self.attempts[attempts] = self.attempts.get(attempts, 0) + count
+        self.players += other.players
+        self.searches += other.searches
+        self.misses += other.misses
+        self.queries.merge(other.queries)
+        self.missed_queries.merge(other.missed_queries)
+        self.distinct_queries.merge(other.distinct_queries)
+        self.searchers += other.searchers
+
+    def to_state(self):
+        self.fold()
+        return {
+            "games": self.games, "wins": self.wins, "win_attempts": self.win_attempts,
+            "attempts": self.attempts, "players": self.players,
+            "searches": self.searches, "misses": self.misses, "searchers": self.searchers,
+            "queries": self.queries.to_state(), "missed_queries": self.missed_queries.to_state(),
+            "distinct_queries": self.distinct_queries.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        rollup = cls()
+        for name in ("games", "wins", "win_attempts", "attempts", "players", "searches", "misses", "searchers"):
+            setattr(rollup, name, state[name])
+        rollup.queries = TopK.from_state(state["queries"])
+        rollup.missed_queries = TopK.from_state(state["missed_queries"])
+        rollup.distinct_queries = HyperLogLog.from_state(state["distinct_queries"])
+        return rollup
+
+    def report(self, top=20):
+        self.fold()
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "losses": self.games - self.wins,
+            "players": self.players,
+            "average_attempts_per_win": self.win_attempts / self.wins if self.wins else None,
+            "attempts_histogram": {int(k): v for k, v in sorted(self.attempts.items(), key=lambda i: int(i[0]))},
+            "searches": self.searches,
+            "searchers": self.searchers,
+            "misses": self.misses,
+            "miss_rate": self.misses / self.searches if self.searches else None,
+            "distinct_queries": self.distinct_queries.count(),
+            "top_queries": [
+                {"query": query, "searches": count, "misses": min(self.missed_queries.estimate(query), count),
+                 "miss_rate": min(self.missed_queries.estimate(query), count) / count}
+                for query, count in self.queries.top(top)
+            ],
+            "top_missed_queries": [{"query": query, "misses": count}
+                                   for query, count in self.missed_queries.top(top)],
+        }
+
+
+def _feed(rollup, kind, lines, checkpoint):
+    if kind == GUESS_LOG:
+        for line in lines:
+            rollup.add_game(line)
+    else:
+        previous = checkpoint.get("query")
+        for line in lines:
+            previous = rollup.add_search(line, previous)
+        checkpoint["query"] = previous
+
+
+# New complete lines of a text log since its checkpoint. The checkpoint holds
+# the last rotated segment read and the inode and byte offset reached in the
+# active file; once that file is rotated it reappears as the next segment,
+# which is read from the same offset. Holds the shared lock, so a rotation
+# cannot happen mid-read.
+def _read_text_log(path, checkpoint):
+    lines = []
+    with locked(path, shared=True):
+        fresh = [segment for segment in segments(path) if segment[0] > checkpoint.get("segment", 0)]
+        skip = checkpoint.get("offset", 0) if checkpoint.get("ino") is not None else 0
+        for _, segment_path, _ in fresh:
+            with gzip.open(segment_path, "rb") as f:
+                data = f.read()
+            lines += data[skip:].decode("utf-8", errors="replace").splitlines(keepends=True)
+            skip = 0
+        if fresh:
+            checkpoint.update(segment=fresh[-1][0], ino=None, offset=0)
+
+        version = file_version(path)
+        if version is None:
+            return lines
+        ino, size, _ = version
+        offset = checkpoint.get("offset", 0)
+        if ino != checkpoint.get("ino") or size < offset:
+            offset = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    lines += complete.decode("utf-8", errors="replace").splitlines(keepends=True)
+    checkpoint.update(ino=ino, offset=offset + len(complete))
+    return lines
+
+
+def _read_sqlite_log(db_path, username, kind, checkpoint):
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(
+            "SELECT id, entry FROM logs WHERE username = ? AND kind = ? AND id > ? ORDER BY id",
+            (username, kind, checkpoint.get("id", 0)),
+        ).fetchall()
+    finally:
+        connection.close()
+    if rows:
+        checkpoint["id"] = rows[-1][0]
+    return [line for _, entry in rows for line in entry.splitlines(keepends=True)]
+
+
+# Worker: scan a batch of (source, username, kind, checkpoint) jobs and return
+# one partial rollup plus the advanced checkpoints
+def scan_batch(jobs):
+    rollup = Rollup()
+    checkpoints = {}
+    for source, username, kind, checkpoint in jobs:
+        checkpoint = dict(checkpoint)
+        if source[0] == SQLITE:
+            lines = _read_sqlite_log(source[1], username, kind, checkpoint)
+        else:
+            lines = _read_text_log(os.path.join(source[1], username, f"{kind}.txt"), checkpoint)
+        if lines:
+            # First lines from this user's log: count them once as a player/searcher
+            if not checkpoint.get("seen"):
+                checkpoint["seen"] = True
+                if kind == GUESS_LOG:
+                    rollup.players += 1
+                else:
+                    rollup.searchers += 1
+            _feed(rollup, kind, lines, checkpoint)
+        checkpoints[f"{username}/{kind}"] = checkpoint
+    return rollup, checkpoints
+
+
+def _usernames(source):
+    if source[0] == SQLITE:
+        if not os.path.exists(source[1]):
+            return []
+        connection = sqlite3.connect(f"file:{source[1]}?mode=ro", uri=True)
+        try:
+            return [row[0] for row in connection.execute(
+                "SELECT DISTINCT username FROM logs WHERE kind IN (?, ?) ORDER BY username", KINDS)]
+        finally:
+            connection.close()
+    folder = source[1]
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name)))
+
+
+def load_state(path, source_name):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION and state.get("source") == source_name:
+            return Rollup.from_state(state["rollup"]), state["checkpoints"]
+    return Rollup(), {}
+
+
+def save_state(path, source_name, rollup, checkpoints):
+    state = {"version": STATE_VERSION, "source": source_name, "updated": time.time(),
+             "checkpoints": checkpoints, "rollup": rollup.to_state()}
+    atomic_write_lines(path, [json.dumps(state)])
+
+
+# Bring the saved rollup up to date: every user's guessing and search logs are
+# split into batches, scanned from their checkpoints on a process pool, and the
+# partial rollups merged. Returns the updated Rollup.
+def update(source, state_path, workers=None):
+    source_name = f"{source[0]}:{os.path.abspath(source[1])}"
+    rollup, checkpoints = load_state(state_path, source_name)
+    jobs = [(source, username, kind, checkpoints.get(f"{username}/{kind}", {}))
+            for username in _usernames(source) for kind in KINDS]
+
+    workers = workers or os.cpu_count() or 1
+    batch_count = min(len(jobs), workers * 4) or 1
+    batches = [jobs[i::batch_count] for i in range(batch_count)]
+    if workers == 1 or len(batches) == 1:
+        results = map(scan_batch, batches)
+        for partial, advanced in results:
+            rollup.merge(partial)
+            checkpoints.update(advanced)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial, advanced in pool.map(scan_batch, batches):
+                rollup.merge(partial)
+                checkpoints.update(advanced)
+
+    save_state(state_path, source_name, rollup, checkpoints)
+    return rollup
+
+
+def print_report(report):
+    average = report["average_attempts_per_win"]
+    print(f"Games: {report['games']} by {report['players']} players "
+          f"({report['wins']} wins, {report['losses']} losses)")
+    print(f"Average attempts per win: {average:.2f}" if average is not None else "Average attempts per win: n/a")
+    miss_rate = report["miss_rate"]
+    print(f"Searches: {report['searches']} by {report['searchers']} users, {report['misses']} misses"
+          + (f" ({miss_rate:.1%})" if miss_rate is not None else "")
+          + f", ~{report['distinct_queries']} distinct queries")
+    if report["top_queries"]:
+        print(f"\n{'searches':>9} {'misses':>7} {'miss%':>6}  query")
+        for row in report["top_queries"]:
+            print(f"{row['searches']:>9} {row['misses']:>7} {row['miss_rate']:>6.1%}  {row['query']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up the number guessing and movie search logs. "
+                                                 "Only lines added since the last run are read.")
+    parser.add_argument("--data-dir", default=".", help="folder holding user_logs/ (text storage)")
+    parser.add_argument("--storage", choices=[TEXT, SQLITE], default=os.environ.get("APP_STORAGE", TEXT))
+    parser.add_argument("--db", default=os.environ.get("APP_DB", "app.sqlite3"), help="SQLite database file")
+    parser.add_argument("--state", help=f"rollup state file (default: {STATE_FILE} in the data dir)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20, help="queries to list")
+    parser.add_argument("--rebuild", action="store_true", help="discard the saved rollup and rescan everything")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    options = parser.parse_args()
+
+    if options.storage == SQLITE:
+        source = (SQLITE, options.db)
+    else:
+        source = (TEXT, os.path.join(options.data_dir, LOGS_FOLDER))
+    state_path = options.state or os.path.join(options.data_dir, STATE_FILE)
+    if options.rebuild and os.path.exists(state_path):
+        os.remove(state_path)
+
+    began = time.perf_counter()
+    report = update(source, state_path, options.workers).report(options.top)
+    if options.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+        print(f"\nUpdated in {time.perf_counter() - began:.2f}s")
@@ -0,0 +1,254 @@
+import gzip
+import os
+import re
+import time
+from datetime import datetime
+
+from file_lock import locked
+from movie_persistence import atomic_write_lines
+
+# Compressed segments are cut into gzip members of about this many input bytes;
+# a member can be decompressed on its own, which is what the index points at
+BLOCK_BYTES = 64 * 1024
+TAIL_CHUNK = 8192
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_TIMESTAMP = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d")
+
+
+# The "YYYY-mm-dd HH:MM:SS" a log line starts with, or None
+def line_timestamp(line):
+    if _TIMESTAMP.match(line):
+        return line[:19]
+    return None
+
+
+# A datetime, epoch seconds or timestamp string as a "YYYY-mm-dd HH:MM:SS" string
+def as_timestamp(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+# Rotated segments of a log, oldest first: (sequence, segment path, index path)
+def segments(path):
+    folder, name = os.path.split(path)
+    pattern = re.compile(re.escape(name) + r"\.(\d{6})\.gz$")
+    found = []
+    for entry in os.listdir(folder or "."):
+        match = pattern.match(entry)
+        if match:
+            segment = os.path.join(folder, entry)
+            found.append((int(match.group(1)), segment, segment + ".idx"))
+    return sorted(found)
+
+
+# Compress a closed segment into gzip members of about BLOCK_BYTES each and write
+# its sparse index: one "offset length lines first last" row per member. A line
+# without a timestamp of its own is placed between the nearest stamped lines
+# around it, or the segment's start and end when there are none.
+def compress_segment(source, segment_path, started, ended):
+    with open(source, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines()
+    stamps = [line_timestamp(line) for line in lines]
+    after = [ended] * len(lines)
+    following = ended
+    for i in range(len(lines) - 1, -1, -1):
+        following = stamps[i] or following
+        after[i] = following
+
+    members = []
+    index = []
+    offset = 0
+    before = started
+    i = 0
+    while i < len(lines):
+        first = stamps[i] or before
+        block, size = [], 0
+        while i < len(lines) and size < BLOCK_BYTES:
+            block.append(lines[i])
+            size += len(lines[i])
+            before = stamps[i] or before
+            i += 1
+        member = gzip.compress("".join(block).encode("utf-8"), mtime=0)
+        members.append(member)
+        index.append(f"{offset}\t{len(member)}\t{len(block)}\t{first}\t{after[i - 1]}\n")
+        offset += len(member)
+
+    # The header holds the time range of the whole segment
+    if index:
+        started, ended = index[0].split("\t")[3], index[-1].rstrip("\n").split("\t")[4]
+    index.insert(0, f"# {started}\t{ended}\n")
+    # The index goes first: readers only look for segments that have a .gz
+    atomic_write_lines(segment_path + ".idx", index)
+    atomic_write_lines(segment_path, members, binary=True)
+
+
+# Size/age based rotation for the buffered LogWriter. When a log passes
+# max_bytes, or its current segment is older than max_age seconds, the active
+# file is renamed away and compressed to "<name>.NNNNNN.gz" with a ".idx"
+# sidecar, all under the exclusive file lock; writers in every process hold the
+# shared lock while appending and reopen when the inode changes, and readers
+# hold it while reading.
+class LogRotation:
+    def __init__(self, max_bytes=1024 * 1024, max_age=24 * 3600):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._started = {}
+
+    # When the active file's segment began. It is kept in a "<name>.start"
+    # sidecar, so the age is the same in every process and survives restarts.
+    def _start_of(self, path):
+        started = self._started.get(path)
+        if started is None:
+            try:
+                with open(path + ".start", "r") as f:
+                    started = float(f.read())
+            except (FileNotFoundError, ValueError):
+                started = self._first_start(path)
+                self._mark_start(path, started)
+            self._started[path] = started
+        return started
+
+    # A log without a sidecar started at its last rotation or its first
+    # timestamped line; failing both, its age is counted from now on
+    @staticmethod
+    def _first_start(path):
+        existing = segments(path)
+        if existing:
+            return os.path.getmtime(existing[-1][1])
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            stamp = line_timestamp(f.readline())
+        return time.mktime(time.strptime(stamp, TIMESTAMP_FORMAT)) if stamp else time.time()
+
+    def _mark_start(self, path, started):
+        with open(path + ".start", "w") as f:
+            f.write(repr(started))
+        self._started[path] = started
+
+    def due(self, path, size):
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self._start_of(path) >= self.max_age
+
+    # Move the active file aside and compress it; returns the segment path, or
+    # None when another process rotated it first
+    def rotate(self, path):
+        with locked(path):
+            if not os.path.exists(path):
+                return None
+            self._started.pop(path, None)
+            if not self.due(path, os.path.getsize(path)):
+                return None
+            started = as_timestamp(self._start_of(path))
+            folder, name = os.path.split(path)
+            taken = [int(entry[len(name) + 1:len(name) + 7]) for entry in os.listdir(folder or ".")
+                     if re.match(re.escape(name) + r"\.\d{6}\.(gz|closing)$", entry)]
+            sequence = max(taken, default=0) + 1
+            segment_path = f"{path}.{sequence:06d}.gz"
+            closing = f"{path}.{sequence:06d}.closing"
+            os.replace(path, closing)
+            compress_segment(closing, segment_path, started, as_timestamp(time.time()))
+            os.remove(closing)
+            self._mark_start(path, time.time())
+        return segment_path
+
+
+# Read-side API over one log: the active file plus its compressed segments.
+# tail(n) reads backwards and stops as soon as it has n lines; between(t1, t2)
+# uses the sparse indexes to decompress only the members whose time range
+# overlaps. Times are datetimes, epoch seconds or "YYYY-mm-dd HH:MM:SS" strings.
+class LogHistory:
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def _read_index(index_path):
+        with open(index_path, "r") as f:
+            started, ended = f.readline()[2:].rstrip("\n").split("\t")
+            blocks = []
+            for line in f:
+                offset, length, count, first, last = line.rstrip("\n").split("\t")
+                blocks.append((int(offset), int(length), int(count), first, last))
+        return started, ended, blocks
+
+    @staticmethod
+    def _read_block(segment_path, offset, length):
+        with open(segment_path, "rb") as f:
+            f.seek(offset)
+            data = gzip.decompress(f.read(length))
+        return data.decode("utf-8", errors="replace").splitlines(keepends=True)
+
+    def _active_tail(self, n):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            position, data = end, b""
+            while position > 0 and data.count(b"\n") <= n:
+                step = min(TAIL_CHUNK, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+        return lines[-n:] if n else []
+
+    # The last n lines, oldest first
+    def tail(self, n):
+        with locked(self.path, shared=True):
+            return self._tail(n)
+
+    def _tail(self, n):
+        lines = self._active_tail(n)
+        for _, segment_path, index_path in reversed(segments(self.path)):
+            if len(lines) >= n:
+                break
+            _, _, blocks = self._read_index(index_path)
+            for offset, length, _, _, _ in reversed(blocks):
+                lines = self._read_block(segment_path, offset, length) + lines
+                if len(lines) >= n:
+                    break
+        return lines[-n:] if n else []
+
+    # Lines logged between start and end (inclusive), oldest first. Lines without
+    # a timestamp of their own are matched by the time range of their block (or,
+    # in the active file, by the time since the last rotation). The active file
+    # is at most max_bytes and is scanned.
+    def between(self, start=None, end=None):
+        with locked(self.path, shared=True):
+            return list(self._between(as_timestamp(start), as_timestamp(end)))
+
+    def _between(self, start, end):
+        def overlaps(first, last):
+            return (start is None or last >= start) and (end is None or first <= end)
+
+        def matches(stamp):
+            return (start is None or stamp >= start) and (end is None or stamp <= end)
+
+        # Unstamped lines in the active file were written after the last rotation
+        active_start = "0000-00-00 00:00:00"
+        for _, segment_path, index_path in segments(self.path):
+            started, ended, blocks = self._read_index(index_path)
+            active_start = ended
+            if not overlaps(started, ended):
+                continue
+            for offset, length, _, first, last in blocks:
+                if not overlaps(first, last):
+                    continue
+                for line in self._read_block(segment_path, offset, length):
+                    stamp = line_timestamp(line)
+                    if stamp is None or matches(stamp):
+                        yield line
+
+        if os.path.exists(self.path):
+            unstamped = overlaps(active_start, as_timestamp(time.time()))
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    stamp = line_timestamp(line)
+                    if matches(stamp) if stamp else unstamped:
+                        yield line
+
+    # Every line, oldest first
+    def lines(self):
+        return self.between()
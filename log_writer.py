@@ -0,0 +1,183 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from file_lock import locked
+from instrumentation import ENABLED as METRICS_ENABLED, add_bytes, span
+
+_stamp_second = None
+_stamp_text = ""
+
+
+# "%Y-%m-%d %H:%M:%S" for the current time, formatted at most once per second
+def cached_timestamp():
+    global _stamp_second, _stamp_text
+    second = int(time.time())
+    if second != _stamp_second:
+        _stamp_text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _stamp_second = second
+    return _stamp_text
+
+
+# Buffered log backend. Callers enqueue (path, line) events and return at once;
+# a background thread groups them per file and writes each group in one call,
+# keeping a small LRU of open append handles. Pending lines are written once a
+# file has batch_size of them, after flush_interval seconds, or on flush().
+# When the queue is full new events are dropped and counted, never blocked on.
+# With a rotation policy (log_rotation.LogRotation) each batch is appended under
+# the file's shared lock and full files are rotated after the write.
+class LogWriter:
+    def __init__(self, max_queue=10_000, batch_size=256, flush_interval=0.5, max_open_files=32,
+                 rotation=None):
+        self.queue = queue.Queue(max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_open_files = max_open_files
+        self.rotation = rotation
+        self.dropped = {}
+        self.written = 0
+        self.writes = 0
+        self.errors = 0
+        self._files = OrderedDict()
+        self._pending = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    # Queue one line for a file; returns False if it had to be dropped
+    def write(self, path, line):
+        if self._thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait((path, line))
+            return True
+        except queue.Full:
+            self.dropped[path] = self.dropped.get(path, 0) + 1
+            return False
+
+    # Block until everything queued so far is on disk (flushed, not fsynced)
+    def flush(self, timeout=None):
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self.queue.put((None, done))
+        return done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        if self._thread is not None:
+            self.queue.put((None, None))
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "pending_lines": sum(len(lines) for lines in self._pending.values()),
+            "dropped": sum(self.dropped.values()),
+            "dropped_by_file": dict(self.dropped),
+            "written": self.written,
+            "writes": self.writes,
+            "errors": self.errors,
+            "open_files": len(self._files),
+        }
+
+    def _handle(self, path):
+        file = self._files.get(path)
+        if file is None:
+            file = open(path, "a")
+            self._files[path] = file
+            if len(self._files) > self.max_open_files:
+                _, oldest = self._files.popitem(last=False)
+                oldest.close()
+        else:
+            self._files.move_to_end(path)
+        return file
+
+    def _close(self, path):
+        file = self._files.pop(path, None)
+        if file is not None:
+            file.close()
+
+    # Write one file's pending lines; subclasses can send them elsewhere
+    def _write_lines(self, path, lines):
+        if self.rotation is None:
+            file = self._handle(path)
+            file.write("".join(lines))
+            file.flush()
+            return
+        with locked(path, shared=True):
+            file = self._handle(path)
+            try:
+                moved = os.stat(path).st_ino != os.fstat(file.fileno()).st_ino
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                # Rotated by another process since we opened it
+                self._close(path)
+                file = self._handle(path)
+            file.write("".join(lines))
+            file.flush()
+            size = file.tell()
+        if self.rotation.due(path, size):
+            self._close(path)
+            self.rotation.rotate(path)
+
+    # Runs on the writer thread when it stops
+    def _shutdown(self):
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+    def _write_pending(self, path):
+        lines = self._pending.pop(path, None)
+        if not lines:
+            return
+        try:
+            # Time and count the real write here; callers only see the enqueue
+            with span("log_writer.write"):
+                self._write_lines(path, lines)
+            if METRICS_ENABLED:
+                add_bytes("log_writer.write", written=sum(len(line.encode()) for line in lines))
+            self.written += len(lines)
+            self.writes += 1
+        except OSError:
+            self.errors += len(lines)
+
+    def _write_all(self):
+        for path in list(self._pending):
+            self._write_pending(path)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                path, item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                path, item = None, False
+
+            if path is not None:
+                lines = self._pending.setdefault(path, [])
+                lines.append(item)
+                if len(lines) >= self.batch_size:
+                    self._write_pending(path)
+            elif item is None:
+                self._write_all()
+                self._shutdown()
+                return
+            elif item is not False:
+                self._write_all()
+                item.set()
+                last_flush = time.monotonic()
+
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._write_all()
+                last_flush = time.monotonic()
@@ -1,103 +1,334 @@
 import os
-import math
+import sys
+import atexit
 import time
 import random
+from bisect import bisect_left
 from datetime import datetime
 
+from calc_batch import ERROR_TEXT, OPERATIONS, calculate, evaluate_batch, history_text, parse_operations
+from catalog_manager import APPENDED, UNCHANGED
+from instrumentation import add_bytes, profile_session, timed
+from log_rotation import LogRotation
+from log_writer import cached_timestamp
+from movie_catalog import MovieCatalog
+from movie_index import BrowseIndex, TrigramIndex
+from movie_search import ranked_search
+from movie_persistence import parse_movie_line
+from pager import ask_more, render_pages
+from query_cache import QueryCache
+from storage import (CALCULATION_LOG, GUESS_LOG, SEARCH_LOG, SQLITE, USER_LOG,
+                     SQLiteBackend, TextFileBackend)
+
 USER_CREDENTIALS_FILE = 'user_credentials.txt'
 USER_LOGS_FOLDER = 'user_logs'
+MOVIES_FILE = 'listmovie.txt'
+MOVIES_SNAPSHOT_FILE = 'listmovie.snapshot'
+
+# fsync policy for new movies: "always", "batch" or "interval"
+MOVIE_FSYNC_POLICY = os.environ.get("MOVIE_FSYNC_POLICY", "batch")
+MOVIE_COMPACT_INTERVAL = 30
+# Repeated searches are answered from memory for up to this many seconds
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_BYTES = 8 * 1024 * 1024
+# Long listings are shown this many lines per page
+PRINT_PAGE_SIZE = 50
+MOVIE_SORT_KEYS = ("id", "name", "year", "genre")
+TODO_SORT_KEYS = ("id", "deadline")
+# Where all state lives: "text" (the files above) or "sqlite" (one database file)
+STORAGE_BACKEND = os.environ.get("APP_STORAGE", "text")
+STORAGE_DB = os.environ.get("APP_DB", "app.sqlite3")
+# Per-user logs are rotated into gzip segments past this size or age (0 turns either off)
+LOG_ROTATE_BYTES = int(os.environ.get("LOG_ROTATE_BYTES", 1024 * 1024))
+LOG_ROTATE_SECONDS = int(os.environ.get("LOG_ROTATE_SECONDS", 7 * 24 * 3600))
+
+if STORAGE_BACKEND == SQLITE:
+    storage = SQLiteBackend(STORAGE_DB)
+else:
+    storage = TextFileBackend(USER_CREDENTIALS_FILE, USER_LOGS_FOLDER, MOVIES_FILE, MOVIES_SNAPSHOT_FILE,
+                              lambda file: parse_movies_file(file), MOVIE_FSYNC_POLICY,
+                              LogRotation(LOG_ROTATE_BYTES, LOG_ROTATE_SECONDS))
+atexit.register(storage.close)
+credential_store = storage.credentials
+log_writer = storage.log_writer
+# Loads the catalog once per process and afterwards only reads what was
+# added to it; its generation keys the search cache
+catalog_manager = storage.catalog
+netflix_movies = MovieCatalog()
+movie_index = TrigramIndex()
+browse_index = BrowseIndex()
+todo_stores = {}
+search_cache = QueryCache(max_bytes=SEARCH_CACHE_BYTES, ttl=SEARCH_CACHE_TTL)
+name_order = (None, None)
+
+
+# Parse an open listmovie.txt (binary) into a catalog, counting the malformed
+# lines skipped; file is None when there is no movie file yet
+@timed()
+def parse_movies_file(file):
+    movies = MovieCatalog()
+    malformed = 0
+
+    if file is not None:
+        for idx, raw in enumerate(file):
+            line = raw.decode("utf-8", errors="replace")
+            movie = parse_movie_line(line)
+            if movie is None:
+                print(f"Skipping malformed line at index {idx}: {line.strip()}")
+                malformed += 1
+                continue
+            movies.add(idx + 1, *movie)
+        add_bytes("parse_movies_file", read=file.tell())
+    else:
+        print("No existing movie data found, starting with an empty list.")
 
-netflix_movies = {}
+    return movies, malformed
 
 
+# Make netflix_movies and its indexes current with listmovie.txt. Cheap (one
+# stat) when nothing changed, so it can run on every Netflix menu visit.
+@timed()
 def load_movies_from_file():
     global netflix_movies
-    netflix_movies = {}
-
-    if os.path.exists("listmovie.txt"):
-        with open("listmovie.txt", "r") as file:
-            lines = file.readlines()
-            for idx, line in enumerate(lines):
-
-                line = line.strip()
-                if not line or "| Genre:" not in line or "| Year:" not in line:
-                    print(f"Skipping malformed line at index {idx}: {line}")
-                    continue
-
-                try:
-                    parts = line.split(" | ")
-                    name = parts[0].split(": ")[1]
-                    genre = parts[1].split(": ")[1]
-                    year = int(parts[2].split(": ")[1])
 
+    if catalog_manager.is_current():
+        return
+    with catalog_manager.lock:
+        change, added_ids = catalog_manager.refresh()
+        if change == UNCHANGED:
+            return
+        netflix_movies = catalog_manager.catalog
+
+        if change == APPENDED:
+            for movie_id in added_ids:
+                movie = netflix_movies[movie_id]
+                if movie_index.ready:
+                    movie_index.add(movie_id, movie["name"])
+                if browse_index.ready:
+                    browse_index.add(movie_id, movie["genre"], movie["year"])
+        else:
+            # Built on the first search so a cold start does not touch every title
+            movie_index.clear()
+            browse_index.clear()
 
-                    netflix_movies[idx + 1] = {"name": name, "genre": genre, "year": year}
-                except IndexError:
-                    print(f"Skipping malformed line at index {idx}: {line}")
-                    continue
-    else:
-        print("No existing movie data found, starting with an empty list.")
-
+    catalog_manager.start_compactor(MOVIE_COMPACT_INTERVAL, save_movies_to_file)
 
 
+# Rewrite the whole of listmovie.txt atomically (temp file + rename)
+# Other processes' appends are read in first under the exclusive lock, so the
+# rewrite never drops a movie it has not seen. Dropping malformed lines
+# renumbers the movies after them, so the indexes are rebuilt on next use.
 def save_movies_to_file():
     global netflix_movies  # Access the global variable
-    with open("listmovie.txt", "w") as file:
-        for movie_info in netflix_movies.values():
-            file.write(f"Name: {movie_info['name']} | Genre: {movie_info['genre']} | Year: {movie_info['year']}\n")
+    with catalog_manager.writing():
+        load_movies_from_file()
+        generation = catalog_manager.generation
+        catalog_manager.rewrite()
+        if catalog_manager.generation != generation:
+            netflix_movies = catalog_manager.catalog
+            movie_index.clear()
+            browse_index.clear()
+
+# Build the trigram index on first use after a load
+def ensure_movie_index():
+    if not movie_index.ready:
+        # Under the catalog lock so concurrent callers build it once
+        with catalog_manager.lock:
+            if not movie_index.ready:
+                movie_index.build(netflix_movies)
+
+# Build the genre and year indexes on first use after a load
+def ensure_browse_index():
+    if not browse_index.ready:
+        with catalog_manager.lock:
+            if not browse_index.ready:
+                browse_index.build(netflix_movies)
+
+# Ranked search over the shared catalog. Runs under the catalog lock: the numpy
+# kernel holds buffer views of the catalog and index arrays, and an array
+# cannot grow while a view of it exists, so adds must wait until it is done.
+def ranked_movies(query, k=10, genre=None, year_min=None, year_max=None):
+    ensure_movie_index()
+    with catalog_manager.lock:
+        return ranked_search(netflix_movies, movie_index, query, k, genre, year_min, year_max)
+
+# Stream (id, movie) pairs matching a genre and year range, ordered by year.
+# Pages are cut from the index, so only the requested movies are decoded.
+def browse_movies(genre=None, year_min=None, year_max=None, offset=0, limit=None):
+    ensure_browse_index()
+    movie_ids = browse_index.query(genre, year_min, year_max, offset)
+    for count, movie_id in enumerate(movie_ids):
+        if limit is not None and count >= limit:
+            break
+        yield movie_id, netflix_movies[movie_id]
 
 # Function to search for a movie by name
+@timed()
 def search_movie(movie_name):
     movie_name = movie_name.lower()
-    matched_movies = [movie_info for movie_info in netflix_movies.values() if movie_name in movie_info["name"].lower()]
+    ensure_movie_index()
+
+    # Only titles sharing every trigram with the query can contain it
+    candidate_ids = movie_index.candidates(movie_name)
+    if candidate_ids is None:
+        movies = netflix_movies.values()
+    else:
+        movies = (netflix_movies[movie_id] for movie_id in candidate_ids)
+
+    matched_movies = [movie_info for movie_info in movies if movie_name in movie_info["name"].lower()]
     return matched_movies
 
+# search_movie through the result cache; the returned list must not be modified
+def cached_search_movie(movie_name):
+    generation = catalog_manager.generation
+    results = search_cache.get(movie_name, generation)
+    if results is None:
+        results = search_movie(movie_name)
+        search_cache.put(movie_name, generation, results)
+    return results
+
 # Log search results to file
+@timed()
 def log_search_to_file(username, movie_name, results):
-    base_path = f"user_logs/{username}"
-
-    if not os.path.exists(base_path):
+    if not storage.has_user(username):
         print(f"Error: User folder for {username} does not exist!")
         return
 
-    log_file = os.path.join(base_path, "search_movies.txt")
-
-    with open(log_file, "a") as file:
-        if results:
-            for movie in results:
-                file.write(f"Search Query: {movie_name} - Found: {movie['name']} | Genre: {movie['genre']} | Year: {movie['year']}\n")
+    if results:
+        lines = [f"Search Query: {movie_name} - Found: {movie['name']} | Genre: {movie['genre']} | Year: {movie['year']}\n"
+                 for movie in results]
+        text = "".join(lines)
+    else:
+        text = f"Search Query: {movie_name} - Movie not found\n"
+    storage.write_log(username, SEARCH_LOG, text)
+
+# Catalog rows in title order, rebuilt only after the catalog changes
+def movie_name_order():
+    global name_order
+    generation, order = name_order
+    if order is None or generation != catalog_manager.generation or len(order) != len(netflix_movies):
+        order = netflix_movies.rows_by_name()
+        name_order = (catalog_manager.generation, order)
+    return order
+
+# Stream (id, movie) pairs in one of MOVIE_SORT_KEYS orders, starting offset
+# movies in or, for id order, at the first id >= start_id. Year and genre order
+# walk the browse index and id order bisects the id column, so a page costs
+# what it shows rather than the size of the catalog.
+def iter_movies(sort="id", offset=0, start_id=None):
+    if sort == "name":
+        order = movie_name_order()
+        for position in range(offset, len(order)):
+            yield netflix_movies.ids[order[position]], netflix_movies.record(order[position])
+        return
+    if sort in ("year", "genre"):
+        ensure_browse_index()
+        if sort == "year":
+            indexes = [browse_index.by_year]
         else:
-            file.write(f"Search Query: {movie_name} - Movie not found\n")
+            indexes = [browse_index.by_genre[genre] for genre in sorted(browse_index.by_genre)]
+        for index in indexes:
+            size = len(index)
+            if offset >= size:
+                offset -= size
+                continue
+            for movie_id in index.range_ids(offset=offset):
+                yield movie_id, netflix_movies[movie_id]
+            offset = 0
+        return
+    first = bisect_left(netflix_movies.ids, start_id) if start_id is not None else offset
+    for row in range(first, len(netflix_movies)):
+        yield netflix_movies.ids[row], netflix_movies.record(row)
+
+def format_movie(movie_id, movie_info):
+    return f"{movie_id}. {movie_info['name']} | Genre: {movie_info['genre']} | Year: {movie_info['year']}\n"
 
-# Function to display all movies
-def print_all_movies():
+# Function to display all movies, one page (and one write) at a time
+def print_all_movies(sort="id", start_id=None, page_size=PRINT_PAGE_SIZE, more=ask_more):
     global netflix_movies  # Access the global variable
     print("\nList of All Movies:")
-    for movie_id, movie_info in netflix_movies.items():
-        print(f"{movie_id}. {movie_info['name']} | Genre: {movie_info['genre']} | Year: {movie_info['year']}")
+    render_pages(iter_movies(sort, start_id=start_id), format_movie, page_size, more=more)
+
+def user_print_all_movies():
+    sort = input(f"Sort by ({'/'.join(MOVIE_SORT_KEYS)}, blank for id): ").strip().lower() or "id"
+    if sort not in MOVIE_SORT_KEYS:
+        print("Invalid sort order. Please try again.")
+        return
+    start_id = None
+    if sort == "id":
+        try:
+            start_id = int(input("Start at movie id (leave blank for the first): ") or 0) or None
+        except ValueError:
+            print("Invalid movie id. Please try again.")
+            return
+    print_all_movies(sort, start_id)
+
+# Add a movie to the catalog and its indexes and append it to listmovie.txt.
+# Returns the new id; raises ValueError for an invalid year.
+def add_movie_record(name, genre, year):
+    # Hold the catalog's write locks so neither a background compaction nor
+    # another process writes between the catch-up and the append
+    with catalog_manager.writing():
+        # Take in movies other processes appended first, so the new id is free
+        load_movies_from_file()
+        new_id = catalog_manager.next_id()
+        netflix_movies.add(new_id, name, genre, year)
+        if movie_index.ready:
+            movie_index.add(new_id, name)
+        if browse_index.ready:
+            browse_index.add(new_id, genre, year)
+
+        # Append only the new movie instead of rewriting listmovie.txt
+        catalog_manager.append([new_id])
+    return new_id
 
 # Function to add a new movie to the dictionary
 def add_movie():
-    global netflix_movies  # Access the global variable
-    new_id = max(netflix_movies.keys()) + 1 if netflix_movies else 1
     name = input("Enter movie name: ")
     genre = input("Enter movie genre: ")
     year = input("Enter movie year: ")
-    new_movie = {
-        "name": name,
-        "genre": genre,
-        "year": int(year)
-    }
-    netflix_movies[new_id] = new_movie
+
+    try:
+        add_movie_record(name, genre, int(year))
+    except ValueError as e:
+        print(f"Could not add movie: {e}")
+        return
     print(f"\nMovie '{name}' added successfully!")
 
-    # After adding a movie, save all movies to listmovie.txt
-    save_movies_to_file()
+# Bulk import a catalog dump; the new movies are saved with one append
+def bulk_import_movies(path):
+    with catalog_manager.writing():
+        load_movies_from_file()
+        # Imported here: the process pool machinery is only needed for imports
+        from movie_import import import_movies
+        added_ids, report = import_movies(path, netflix_movies, first_id=catalog_manager.next_id())
+        if added_ids:
+            catalog_manager.append(added_ids, sync=True)
+
+    # Cheaper to rebuild on next use than to index a large import one by one
+    if added_ids:
+        movie_index.clear()
+        browse_index.clear()
+    return report
+
+def user_import():
+    path = input("Enter the path of the catalog file to import: ").strip()
+    if not os.path.exists(path):
+        print("File not found!")
+        return
+
+    report = bulk_import_movies(path)
+    print(f"Imported {report['imported']} movies, skipped {report['duplicates']} duplicates"
+          f" and {report['malformed']} malformed lines.")
+    for line_number, line in report["malformed_samples"]:
+        print(f"  line {line_number}: {line}")
+    if report["malformed"] > len(report["malformed_samples"]):
+        print(f"  ... and {report['malformed'] - len(report['malformed_samples'])} more")
 
 # User search function
 def user_search(username):
     movie_name = input("Enter the movie name to search: ")
-    results = search_movie(movie_name)
+    results = cached_search_movie(movie_name)
 
     if results:
         for movie in results:
@@ -107,21 +338,64 @@ def user_search(username):
 
     log_search_to_file(username, movie_name, results)
 
+# Typo-tolerant search: best matches first, with optional genre and year filters
+def user_ranked_search(username, top_k=10):
+    movie_name = input("Enter the movie name to search: ")
+    genre = input("Genre filter (leave blank for any): ").strip() or None
+    try:
+        year_min = int(input("From year (leave blank for any): ") or 0) or None
+        year_max = int(input("To year (leave blank for any): ") or 0) or None
+    except ValueError:
+        print("Invalid year. Please try again.")
+        return
+
+    ranked = ranked_movies(movie_name, top_k, genre, year_min, year_max)
+
+    if ranked:
+        for score, movie_id, movie in ranked:
+            print(f"{score:.0%} {movie['name']} - Genre: {movie['genre']} - Year: {movie['year']}")
+    else:
+        print("Movie not found!")
+
+    log_search_to_file(username, movie_name, [movie for _, _, movie in ranked])
+
+# Browse movies by genre and year range, one page at a time
+def user_browse(page_size=20, more=ask_more):
+    genre = input("Genre (leave blank for any): ").strip() or None
+    try:
+        year_min = int(input("From year (leave blank for any): ") or 0) or None
+        year_max = int(input("To year (leave blank for any): ") or 0) or None
+    except ValueError:
+        print("Invalid year. Please try again.")
+        return
+
+    ensure_browse_index()
+    total = browse_index.count(genre, year_min, year_max)
+    if total == 0:
+        print("No movies match those filters.")
+        return
+
+    print(f"\n{total} movies match:")
+    render_pages(browse_movies(genre, year_min, year_max), format_movie, page_size, more=more)
+
 # Main application function
 def netflix_app(username):
     global netflix_movies  # Access the global variable
     print("Welcome to the Netflix app!")
 
-    # Load the movies from the file at the start
+    # Loaded once per process; later visits only pick up changes to the file
     load_movies_from_file()
 
     while True:
         print("\n1. Search Movie")
         print("2. Add Movie")
         print("3. Print All Movies")
-        print("4. Exit")
+        print("4. Ranked Search (typo tolerant)")
+        print("5. Browse by Genre/Year")
+        print("6. Import Movies from File")
+        print("7. Exit")
 
-        choice = input("Enter choice (1-4): ")
+        choice = input("Enter choice (1-7): ")
 
         if choice == '1':
             user_search(username)
@@ -130,9 +404,18 @@ def netflix_app(username):
             add_movie()
 
         elif choice == '3':
-            print_all_movies()
+            user_print_all_movies()
 
         elif choice == '4':
+            user_ranked_search(username)
+
+        elif choice == '5':
+            user_browse()
+
+        elif choice == '6':
+            user_import()
+
+        elif choice == '7':
             print("Exiting the app.")
             break
 
@@ -143,53 +426,55 @@ def netflix_app(username):
 
 # Function to create a user folder and necessary files
 def create_user_folder(username):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    os.makedirs(folder_path, exist_ok=True)
-
-    user_log_file = os.path.join(folder_path, 'user_log.txt')
-    todo_list_file = os.path.join(folder_path, 'todo_list.txt')
-    number_guessing_log_file = os.path.join(folder_path, 'number_guessing_log.txt')
-
-    if not os.path.exists(user_log_file):
-        with open(user_log_file, 'w') as f:
-            f.write("User log started.\n")
-
-    if not os.path.exists(todo_list_file):
-        with open(todo_list_file, 'w') as f:
-            f.write("To-Do List (incomplete tasks)\n")
-
-    if not os.path.exists(number_guessing_log_file):
-        with open(number_guessing_log_file, 'w') as f:
-            f.write("Number Guessing Game Log\n")
-
-    return folder_path
+    return storage.create_user(username)
 
 # Log user interaction with timestamp
+@timed()
 def log_user_interaction(username, message):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    log_file = os.path.join(folder_path, 'user_log.txt')
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    current_time = cached_timestamp()
 
-    with open(log_file, 'a') as f:
-        f.write(f"{current_time} - {message}\n")
+    line = f"{current_time} - {message}\n"
+    storage.write_log(username, USER_LOG, line)
 
 # Log number guessing game result (win or loss)
+@timed()
 def log_number_guessing_result(username, attempts, result, number):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    log_file = os.path.join(folder_path, 'number_guessing_log.txt')
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    current_time = cached_timestamp()
 
-    with open(log_file, 'a') as f:
-        f.write(f"{current_time} - Game Result: {result} | Number: {number} | Attempts: {attempts}\n")
+    line = f"{current_time} - Game Result: {result} | Number: {number} | Attempts: {attempts}\n"
+    storage.write_log(username, GUESS_LOG, line)
+
+# The user's to-do store, loaded from disk once per process
+def get_todo_store(username):
+    store = todo_stores.get(username)
+    if store is None:
+        store = todo_stores[username] = storage.todo_store(username)
+    return store
 
 # Log a to-do list task with deadline and completion status
+@timed()
 def log_todo_list_task(username, task, deadline, completed=False):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    log_file = os.path.join(folder_path, 'todo_list.txt')
-
-    with open(log_file, 'a') as f:
-        status = "Completed" if completed else "Incomplete"
-        f.write(f"{task} | Deadline: {deadline} | Status: {status}\n")
+    store = get_todo_store(username)
+    task_id = store.add(task, deadline)
+    if completed:
+        store.complete(task_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return task_id
+
+# Check a username and password, logging the sign-in on success
+def authenticate(username, password):
+    if credential_store.verify(username, password):
+        log_user_interaction(username, f"User {username} logged in.")
+        return True
+    return False
+
+# Create an account and its log folder; False if the username is taken
+def create_account(username, password):
+    # Stores a salted hash, never the plain password
+    if not credential_store.register(username, password):
+        return False
+    create_user_folder(username)
+    log_user_interaction(username, f"User {username} registered an account.")
+    return True
 
 # Function to handle user login
 def login():
@@ -202,17 +487,11 @@ def login():
     password = input("Password: ")
     print("__________________________________________")
 
-    try:
-        with open(USER_CREDENTIALS_FILE, 'r') as f:
-            lines = f.readlines()
-            for line in lines:
-                stored_username, stored_password = line.strip().split(',')
-                if username == stored_username and password == stored_password:
-                    print("Login successful!")
-                    log_user_interaction(username, f"User {username} logged in.")
-                    return username
-    except FileNotFoundError:
+    if not storage.has_accounts():
         print("User credentials file not found. Please register first.")
+    elif authenticate(username, password):
+        print("Login successful!")
+        return username
     print("\n======================================")
     print("||   Invalid username or password.  ||")
     print("======================================\n\n\n\n\n")
@@ -229,49 +508,25 @@ def register():
     password = input("Choose a password: ")
     print("__________________________________________\n\n")
 
-    try:
-        with open(USER_CREDENTIALS_FILE, 'r') as f:
-            lines = f.readlines()
-            for line in lines:
-                stored_username, _ = line.strip().split(',')
-                if username == stored_username:
-                    print("\n\n==========================================")
-                    print("||        Username already taken.       ||")
-                    print("||    Please choose a different one.    ||")
-                    print("==========================================\n\n")
-                    return None
-    except FileNotFoundError:
-        pass
-
-
-    with open(USER_CREDENTIALS_FILE, 'a') as f:
-        f.write(f"{username},{password}\n")
+    if not create_account(username, password):
+        print("\n\n==========================================")
+        print("||        Username already taken.       ||")
+        print("||    Please choose a different one.    ||")
+        print("==========================================\n\n")
+        return None
 
-    create_user_folder(username)
     print("\n\n==========================================")
     print("||      Account created successfully     ||")
     print(f"||           for {username}!           ||")
     print("========================================")
-    log_user_interaction(username, f"User {username} registered an account.")
     return username
 
+def format_task(task_id, task, deadline):
+    return f"{task_id}. {task} | Deadline: {deadline} | Status: Incomplete\n"
+
 # CLI To-Do List Application
 def todo_list(username):
-    tasks = []
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    todo_file = os.path.join(folder_path, 'todo_list.txt')
-    completed_file = os.path.join(folder_path, 'completed_task.txt')
-
-
-    os.makedirs(folder_path, exist_ok=True)
-    if not os.path.exists(todo_file):
-        open(todo_file, 'a').close()
-    if not os.path.exists(completed_file):
-        open(completed_file, 'a').close()
-
-
-    with open(todo_file, 'r') as f:
-        tasks = f.readlines()
+    store = get_todo_store(username)
 
     while True:
         print("\n==========================================")
@@ -280,10 +535,11 @@ def todo_list(username):
         print("==========================================")
         print("||           [1] Add Task ➕            ||")
         print("||           [2] View Tasks 📝          ||")
-        print("||           [3] Exit app 🔚            ||")
+        print("||           [3] Next Due ⏰            ||")
+        print("||           [4] Exit app 🔚            ||")
         print("==========================================")
         print("\n__________________________________________")
-        choice = input("Enter choice (1-3): ")
+        choice = input("Enter choice (1-4): ")
 
         if choice == '1':
             task = input("Enter your task: ")
@@ -294,29 +550,33 @@ def todo_list(username):
             print("||          added to your list.          ||")
             print("==========================================")
         elif choice == '2':
+            tasks = store.list()
             if not tasks:
                 print("\n==========================================")
                 print("||           No tasks available.         ||")
                 print("==========================================")
             else:
+                sort = input(f"Sort by ({'/'.join(TODO_SORT_KEYS)}, blank for id): ").strip().lower()
+                if sort == "deadline":
+                    tasks.sort(key=lambda item: (item[2], item[0]))
                 print("\n==========================================")
                 print("||           Your To-Do List:           ||")
                 print("==========================================")
-                for index, task in enumerate(tasks, start=1):
-                    print(f"{index}. {task.strip()}")
+                render_pages(tasks, format_task, PRINT_PAGE_SIZE)
                 print("\n_______________________________________________________________________________________________")
-                task_number = int(input("Select a task number to view or update its status (0 to go back): "))
+                task_id = int(input("Select a task number to view or update its status (0 to go back): "))
 
-                if task_number == 0:
+                if task_id == 0:
                     continue
 
-                if task_number < 1 or task_number > len(tasks):
+                selected = store.get(task_id)
+                if selected is None:
                     print("Invalid task number. Please try again.")
                     continue
 
 
-                selected_task = tasks[task_number - 1].strip()
-                print(f"\nSelected Task: {selected_task}")
+                task, deadline = selected
+                print(f"\nSelected Task: {task} | Deadline: {deadline} | Status: Incomplete")
 
 
                 print("1. Mark as Completed")
@@ -324,19 +584,14 @@ def todo_list(username):
                 action_choice = input("Enter your choice (1-2): ")
 
                 if action_choice == '1':
-                    task_details = selected_task.split(" | ")
-                    task = task_details[0]
-                    deadline = task_details[1].replace("Deadline: ", "").strip()
                     completion_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-                    # Move task to completed file
-                    with open(completed_file, 'a') as cf:
-                        cf.write(f"{task} | Deadline: {deadline} | Completed on: {completion_date}\n")
-
-                    # Remove task from todo file
-                    tasks.pop(task_number - 1)
-                    with open(todo_file, 'w') as tf:
-                        tf.writelines(tasks)
+                    # Tombstone the task and move it to the completed file
+                    try:
+                        store.complete(task_id, completion_date)
+                    except KeyError:
+                        print("That task was already completed in another session.")
+                        continue
 
                     print(f"Task '{task}' marked as Completed and moved to 'completed_task.txt'.")
                 elif action_choice == '2':
@@ -347,6 +602,15 @@ def todo_list(username):
                     print("==========================================")
 
         elif choice == '3':
+            next_task = store.next_due()
+            if next_task is None:
+                print("\n==========================================")
+                print("||           No tasks available.         ||")
+                print("==========================================")
+            else:
+                task_id, task, deadline = next_task
+                print(f"\nNext due: {task_id}. {task} | Deadline: {deadline}")
+        elif choice == '4':
             print("\n==========================================")
             print("||      Exiting To-Do List. Goodbye!      ||")
             print("==========================================")
@@ -357,18 +621,19 @@ def todo_list(username):
              print("==========================================")
 
 
-# Log a to-do list task with deadline
-def log_todo_list_task(username, task, deadline):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    todo_file = os.path.join(folder_path, 'todo_list.txt')
 
-    with open(todo_file, 'a') as f:
-        f.write(f"{task} | Deadline: {deadline} | Status: Incomplete\n")
 
 
 
 
 
+# Compare a guess with the secret number: "low", "high" or "correct"
+def check_guess(number, guess):
+    if guess < number:
+        return "low"
+    if guess > number:
+        return "high"
+    return "correct"
 
 def number_guessing_game(username):
     print("\n==========================================")
@@ -382,10 +647,11 @@ def number_guessing_game(username):
         while attempts < 10:
             guess = int(input("Guess the number between 1 and 100: "))
             attempts += 1
+            outcome = check_guess(number, guess)
 
-            if guess < number:
+            if outcome == "low":
                 print("Too low! Try again.")
-            elif guess > number:
+            elif outcome == "high":
                 print("Too high! Try again.")
             else:
                 print(f"Congratulations! You guessed the number in {attempts} attempts.")
@@ -403,95 +669,114 @@ def number_guessing_game(username):
 
 
 
+@timed()
 def log_calculation_to_file(username, operation, num1, num2, result):
-    folder_path = os.path.join(USER_LOGS_FOLDER, username)
-    if not os.path.exists(folder_path):  # Ensure the directory exists
-        os.makedirs(folder_path)
-
-    todo_file = os.path.join(folder_path, 'calculation_history.txt')
-
-    with open(todo_file, 'a') as f:
-        f.write(f"{username}: {operation} | {num1} and {num2} = {result}\n")
-
+    storage.prepare_user(username)  # Ensure the directory exists
+
+    line = f"{username}: {operation} | {num1} and {num2} = {result}\n"
+    storage.write_log(username, CALCULATION_LOG, line)
+
+# Evaluate a file of "operation,num1[,num2]" lines in one vectorized pass and
+# log the whole batch to the calculation history with a single write
+def calculate_batch_file(username, path):
+    with open(path, "r") as f:
+        codes, a, b, malformed = parse_operations(f)
+    results, errors = evaluate_batch(codes, a, b)
+
+    storage.prepare_user(username)
+    if len(codes):
+        storage.write_log(username, CALCULATION_LOG, history_text(username, codes, a, b, results, errors))
+    return results, errors, malformed
+
+def batch_calculation(username):
+    path = input("Enter the path of the operations file (operation,num1,num2 per line): ").strip()
+    if not os.path.exists(path):
+        print("File not found!")
+        return
 
+    results, errors, malformed = calculate_batch_file(username, path)
+    failed = sum(1 for error in errors if error)
+    print(f"Evaluated {len(results)} operations: {len(results) - failed} ok, {failed} errors,"
+          f" {len(malformed)} malformed lines skipped.")
+    for result, error in zip(results[:5].tolist(), errors[:5].tolist()):
+        print(f"Result: {ERROR_TEXT[error] if error else result}")
+    if len(results) > 5:
+        print("... full results saved to calculation_history.txt")
+
+# Operation menu, written in one call each time it is shown
+CALCULATOR_MENU = (
+    "\n"
+    "==========================================\n"
+    "||   Select an operation:✖️➗➕➖🟰       ||\n"
+    "==========================================\n"
+    "||  [1]. Add (+)                        ||\n"
+    "||  [2]. Subtract (-)                   ||\n"
+    "||  [3]. Multiply (*)                   ||\n"
+    "||  [4]. Divide (/)                     ||\n"
+    "||  [5]. Power (x^y)                    ||\n"
+    "||  [6]. Square Root (√x)               ||\n"
+    "||  [7]. Batch from file                ||\n"
+    "||  [8]. Exit                           ||\n"
+    "==========================================\n"
+)
 
 # Calculator Application
 def calculator(username):
-    def add(x, y): return x + y
-    def subtract(x, y): return x - y
-    def multiply(x, y): return x * y
-    def divide(x, y): return x / y if y != 0 else "Error! Division by zero."
-    def power(x, y): return x ** y
-    def square_root(x): return math.sqrt(x) if x >= 0 else "Error! Square root of negative number."
-
     print("\n==========================================")
     print("||    Welcome to the Calculator!🧮🔢    || ")
     print("==========================================")
 
     while True:
-        print("\n==========================================")
-        print("||   Select an operation:✖️➗➕➖🟰       ||")
-        print("==========================================")
-        print("||  [1]. Add (+)                        ||")
-        print("||  [2]. Subtract (-)                   ||")
-        print("||  [3]. Multiply (*)                   ||")
-        print("||  [4]. Divide (/)                     ||")
-        print("||  [5]. Power (x^y)                    ||")
-        print("||  [6]. Square Root (√x)               ||")
-        print("||  [7]. Exit                           ||")
-        print("==========================================")
+        sys.stdout.write(CALCULATOR_MENU)
 
-        choice = input("Enter choice (1-7): ")
+        choice = input("Enter choice (1-8): ")
 
         if choice == '7':
+            batch_calculation(username)
+            continue
+
+        if choice == '8':
             log_calculation_to_file(username, "Exit", "N/A", "N/A", "User logged out")
             break
 
-        if choice in ['1', '2', '3', '4', '5', '6']:
-            num1 = float(input("Enter first number: "))
-
-        if choice in ['1', '2', '3', '4', '5']:
-            num2 = float(input("Enter second number: "))
-
-        if choice == '1':
-            result = add(num1, num2)
-            operation = "Addition"
-        elif choice == '2':
-            result = subtract(num1, num2)
-            operation = "Subtraction"
-        elif choice == '3':
-            result = multiply(num1, num2)
-            operation = "Multiplication"
-        elif choice == '4':
-            result = divide(num1, num2)
-            operation = "Division"
-        elif choice == '5':
-            result = power(num1, num2)
-            operation = "Power"
-        elif choice == '6':
-            result = square_root(num1)
-            operation = "Square Root"
-        else:
+        if choice not in ['1', '2', '3', '4', '5', '6']:
             print("Invalid input. Please try again.")
             continue
 
+        num1 = float(input("Enter first number: "))
+        num2 = float(input("Enter second number: ")) if choice != '6' else "N/A"
+
+        # Menu options 1-6 follow the operation codes in calc_batch
+        code = int(choice) - 1
+        result, error = calculate(code, num1, 0.0 if choice == '6' else num2)
+        if error:
+            result = ERROR_TEXT[error]
+        operation = OPERATIONS[code]
+
         print(f"Result: {result}")
 
-        log_calculation_to_file(username, operation, num1, num2 if choice != '6' else "N/A", result)
+        log_calculation_to_file(username, operation, num1, num2, result)
+
 
+# Printed with one write per visit instead of a print() per line
+MAIN_MENU = (
+    "\n"
+    "\n"
+    "==========================================\n"
+    "||           Main Menu Apps 📱          ||\n"
+    "==========================================\n"
+    "||  [1]. Calculator 📅                  ||\n"
+    "||  [2]. To-Do List 📝                  ||\n"
+    "||  [3]. Number Guessing Game 🤔        ||\n"
+    "||  [4]. Netflix App 🎬🍿               ||\n"
+    "||  [5]. Logout 🔚                      ||\n"
+    "==========================================\n"
+)
 
 # Main menu after login
 def main_menu(username):
     while True:
-        print("\n\n==========================================")
-        print("||           Main Menu Apps 📱          ||")
-        print("==========================================")
-        print("||  [1]. Calculator 📅                  ||")
-        print("||  [2]. To-Do List 📝                  ||")
-        print("||  [3]. Number Guessing Game 🤔        ||")
-        print("||  [4]. Netflix App 🎬🍿               ||")
-        print("||  [5]. Logout 🔚                      ||")
-        print("==========================================")
+        sys.stdout.write(MAIN_MENU)
 
 
         choice = input("Enter choice (1-6): ")
@@ -506,44 +791,54 @@ def main_menu(username):
             netflix_app(username)
         elif choice == '5':
             log_user_interaction(username, f"User {username} logged out.")
+            log_writer.flush()
             print("Logging out...")
             break
         else:
             print("Invalid choice. Please try again.")
 
+# The launch screen, also written in one call
+START_SCREEN = (
+    "===============================================================================================================\n"
+    "||     M       M   OOOOOOOO   BBBBBBBB  IIIIIII     LL       EEEEEEEE           AAAAA   PPPPPPP   PPPPPPP    ||\n"
+    "||     MM     MM  OO      OO  BB     B     II       LL       EE                AA   AA  PP    PP  PP    PP   ||\n"
+    "||     M M   M M  O        O  BBBBBBB      II       LL       EEEEEEEE          AAAAAAA  PPPPPPP   PPPPPPP    ||\n"
+    "||     M  M M  M  OO      OO  BB     B     II       LL       EE                AA   AA  PP        PP         ||\n"
+    "||     M   M   M   OOOOOOOO   BBBBBBBB   IIIIIII    LLLLLLL  EEEEEEEE          AA   AA  PP        PP         ||\n"
+    "===============================================================================================================\n"
+    "\n"
+    "\n"
+    "==========================================\n"
+    "||                                      ||\n"
+    "||   Welcome! Please choose an option:  ||\n"
+    "||                                      ||\n"
+    "==========================================\n"
+    "==========================================\n"
+    "||                                      ||\n"
+    "|| \t[1] Login      🔒               ||\n"
+    "|| \t[2] Register   📋               ||\n"
+    "|| \t[3] Exit       🔚               ||\n"
+    "||                                      ||\n"
+    "==========================================\n"
+    "__________________________________________\n"
+)
+
 # Main entry point
 if __name__ == "__main__":
     while True:
-        print("===============================================================================================================")
-        print('||     M       M   OOOOOOOO   BBBBBBBB  IIIIIII     LL       EEEEEEEE           AAAAA   PPPPPPP   PPPPPPP    ||')
-        print('||     MM     MM  OO      OO  BB     B     II       LL       EE                AA   AA  PP    PP  PP    PP   ||')
-        print('||     M M   M M  O        O  BBBBBBB      II       LL       EEEEEEEE          AAAAAAA  PPPPPPP   PPPPPPP    ||')
-        print('||     M  M M  M  OO      OO  BB     B     II       LL       EE                AA   AA  PP        PP         ||')
-        print('||     M   M   M   OOOOOOOO   BBBBBBBB   IIIIIII    LLLLLLL  EEEEEEEE          AA   AA  PP        PP         ||')
-        print("===============================================================================================================\n\n")
-        print("==========================================")
-        print("||                                      ||")
-        print("||   Welcome! Please choose an option:  ||")
-        print("||                                      ||")
-        print("==========================================")
-        print("==========================================")
-        print("||                                      ||")
-        print("|| \t[1] Login      🔒               ||")
-        print("|| \t[2] Register   📋               ||")
-        print("|| \t[3] Exit       🔚               ||")
-        print("||                                      ||")
-        print("==========================================")
-        print("__________________________________________")
+        sys.stdout.write(START_SCREEN)
         option = input("Enter your choice (1-3): ")
 
         if option == '1':
             user = login()
             if user:
-                main_menu(user)
+                with profile_session(user, os.path.join(USER_LOGS_FOLDER, user)):
+                    main_menu(user)
         elif option == '2':
             user = register()
             if user:
-                main_menu(user)
+                with profile_session(user, os.path.join(USER_LOGS_FOLDER, user)):
+                    main_menu(user)
         elif option == '3':
             print("==========================================")
             print("||       Pwede na matulog? yey 😴       ||")
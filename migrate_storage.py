@@ -0,0 +1,152 @@
+import argparse
+import os
+import sys
+
+from log_rotation import LogHistory, line_timestamp
+from movie_persistence import atomic_write_lines, format_movie_line, parse_movie_line
+from storage import LOG_KINDS, SQLiteBackend
+from todo_store import TODO_HEADER, TodoStore
+
+CREDENTIALS_FILE = "user_credentials.txt"
+LOGS_FOLDER = "user_logs"
+MOVIES_FILE = "listmovie.txt"
+
+
+def _lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.readlines()
+
+
+# Copy the flat files under data_dir into the SQLite database at db_path.
+# Movie ids are the listmovie.txt line numbers, as when the app loads it.
+def text_to_sqlite(data_dir, db_path):
+    db = SQLiteBackend(db_path)
+    counts = {"users": 0, "movies": 0, "todos": 0, "logs": 0}
+    with db.transaction() as connection:
+        users = {}
+        for line in _lines(os.path.join(data_dir, CREDENTIALS_FILE)):
+            parts = line.rstrip("\n").split(",", 1)
+            if len(parts) == 2 and parts[0]:
+                users[parts[0]] = parts[1]  # the last line for a user wins
+        connection.executemany("INSERT OR REPLACE INTO users (username, password) VALUES (?, ?)", users.items())
+        counts["users"] = len(users)
+
+        movies = []
+        for idx, line in enumerate(_lines(os.path.join(data_dir, MOVIES_FILE))):
+            movie = parse_movie_line(line)
+            if movie is not None:
+                movies.append((idx + 1, *movie))
+        connection.executemany("INSERT OR REPLACE INTO movies (id, name, genre, year) VALUES (?, ?, ?, ?)", movies)
+        counts["movies"] = len(movies)
+
+        logs_folder = os.path.join(data_dir, LOGS_FOLDER)
+        usernames = sorted(os.listdir(logs_folder)) if os.path.isdir(logs_folder) else []
+        for username in usernames:
+            folder = os.path.join(logs_folder, username)
+            if not os.path.isdir(folder):
+                continue
+
+            todos = []
+            todo_file = os.path.join(folder, "todo_list.txt")
+            if os.path.exists(todo_file):
+                store = TodoStore(todo_file, os.path.join(folder, "completed_task.txt"))
+                todos += [(username, task, deadline, None) for _, task, deadline in store.list()]
+            for line in _lines(os.path.join(folder, "completed_task.txt")):
+                task, _, rest = line.rstrip("\n").partition(" | Deadline: ")
+                deadline, _, completed_on = rest.partition(" | Completed on: ")
+                if rest:
+                    todos.append((username, task, deadline, completed_on))
+            connection.executemany(
+                "INSERT INTO todos (username, task, deadline, completed_on) VALUES (?, ?, ?, ?)", todos,
+            )
+            counts["todos"] += len(todos)
+
+            for kind in LOG_KINDS:
+                # Rotated segments first, then the active file
+                entries = [(username, kind, line, line_timestamp(line))
+                           for line in LogHistory(os.path.join(folder, f"{kind}.txt")).lines()]
+                connection.executemany("INSERT INTO logs (username, kind, entry, ts) VALUES (?, ?, ?, ?)", entries)
+                counts["logs"] += len(entries)
+    db.close()
+    return counts
+
+
+# Write the SQLite database back out as the flat files under data_dir
+def sqlite_to_text(db_path, data_dir):
+    db = SQLiteBackend(db_path)
+    connection = db.connection()
+    counts = {"users": 0, "movies": 0, "todos": 0, "logs": 0}
+
+    users = connection.execute("SELECT username, password FROM users ORDER BY username").fetchall()
+    atomic_write_lines(os.path.join(data_dir, CREDENTIALS_FILE), [f"{user},{stored}\n" for user, stored in users])
+    counts["users"] = len(users)
+
+    movies = connection.execute("SELECT name, genre, year FROM movies ORDER BY id").fetchall()
+    atomic_write_lines(os.path.join(data_dir, MOVIES_FILE), [
+        format_movie_line({"name": name, "genre": genre, "year": year}) for name, genre, year in movies
+    ])
+    counts["movies"] = len(movies)
+
+    usernames = {row[0] for row in connection.execute("SELECT username FROM todos UNION SELECT username FROM logs")}
+    for username in sorted(usernames):
+        folder = os.path.join(data_dir, LOGS_FOLDER, username)
+        os.makedirs(folder, exist_ok=True)
+
+        rows = connection.execute(
+            "SELECT task, deadline, completed_on FROM todos WHERE username = ? ORDER BY id", (username,),
+        ).fetchall()
+        open_tasks = [(task, deadline) for task, deadline, completed_on in rows if completed_on is None]
+        atomic_write_lines(os.path.join(folder, "todo_list.txt"), [TODO_HEADER] + [
+            f"{task} | Deadline: {deadline} | Status: Incomplete | Id: {task_id}\n"
+            for task_id, (task, deadline) in enumerate(open_tasks, start=1)
+        ])
+        atomic_write_lines(os.path.join(folder, "completed_task.txt"), [
+            f"{task} | Deadline: {deadline} | Completed on: {completed_on}\n"
+            for task, deadline, completed_on in rows if completed_on is not None
+        ])
+        counts["todos"] += len(rows)
+
+        for kind in LOG_KINDS:
+            entries = [row[0] for row in connection.execute(
+                "SELECT entry FROM logs WHERE username = ? AND kind = ? ORDER BY id", (username, kind),
+            )]
+            if entries:
+                atomic_write_lines(os.path.join(folder, f"{kind}.txt"), entries)
+                counts["logs"] += len(entries)
+    db.close()
+    return counts
+
+
+def _has_sqlite_data(db_path):
+    if not os.path.exists(db_path):
+        return False
+    db = SQLiteBackend(db_path)
+    try:
+        return any(db.connection().execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                   for table in ("users", "movies", "todos", "logs"))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move the app's data between the text-file and SQLite backends.")
+    parser.add_argument("direction", choices=["to-sqlite", "to-text"])
+    parser.add_argument("--data-dir", default=".", help="folder holding the text files")
+    parser.add_argument("--db", default="app.sqlite3", help="SQLite database file")
+    parser.add_argument("--force", action="store_true", help="write into a target that already has data")
+    options = parser.parse_args()
+
+    if options.direction == "to-sqlite":
+        if _has_sqlite_data(options.db) and not options.force:
+            sys.exit(f"{options.db} already holds data; use --force to add to it.")
+        counts = text_to_sqlite(options.data_dir, options.db)
+    else:
+        existing = [name for name in (CREDENTIALS_FILE, MOVIES_FILE, LOGS_FOLDER)
+                    if os.path.exists(os.path.join(options.data_dir, name))]
+        if existing and not options.force:
+            sys.exit(f"{', '.join(existing)} already exist in {options.data_dir}; use --force to overwrite.")
+        counts = sqlite_to_text(options.db, options.data_dir)
+
+    print("Migrated " + ", ".join(f"{count} {name}" for name, count in counts.items()))
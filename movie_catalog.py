@@ -0,0 +1,161 @@
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+MAX_YEAR = 65535
+
+
+# Columnar movie store: one row per movie, kept in ascending id order.
+# Behaves like the old {id: {"name", "genre", "year"}} dict for lookups and iteration.
+# Columns may also be memoryviews over a mapped snapshot (see movie_snapshot.py),
+# in which case rows are decoded only when accessed.
+class MovieCatalog(Mapping):
+    def __init__(self):
+        self.ids = array("I")
+        self.years = array("H")
+        self.genre_codes = array("H")
+        self.name_offsets = array("I", [0])
+        self.name_buffer = bytearray()
+        self.genres = []
+        self.genre_lookup = {}
+        self.mapped = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, movie_id):
+        return self.row_of(movie_id) is not None
+
+    def __getitem__(self, movie_id):
+        row = self.row_of(movie_id)
+        if row is None:
+            raise KeyError(movie_id)
+        return self.record(row)
+
+    def __setitem__(self, movie_id, movie_info):
+        self.add(movie_id, movie_info["name"], movie_info["genre"], movie_info["year"])
+
+    # Position of a movie id in the columns, or None if it is not stored
+    def row_of(self, movie_id):
+        row = bisect_left(self.ids, movie_id)
+        if row < len(self.ids) and self.ids[row] == movie_id:
+            return row
+        return None
+
+    def name_at(self, row):
+        return str(self.name_buffer[self.name_offsets[row]:self.name_offsets[row + 1]], "utf-8")
+
+    def record(self, row):
+        return {"name": self.name_at(row), "genre": self.genres[self.genre_codes[row]], "year": self.years[row]}
+
+    # Intern a genre string and return its code
+    def genre_code(self, genre):
+        code = self.genre_lookup.get(genre)
+        if code is None:
+            code = len(self.genres)
+            self.genres.append(genre)
+            self.genre_lookup[genre] = code
+        return code
+
+    # Rows ordered case-insensitively by title, using casefold() so non-ASCII
+    # titles ("Élan", "élan") compare equal too; ties keep id order
+    def rows_by_name(self):
+        buffer = bytes(self.name_buffer)
+        offsets = self.name_offsets
+        spans = zip(offsets, offsets[1:len(self.ids) + 1])
+        if buffer.isascii():
+            # Same order as casefold() for ASCII, without decoding every name
+            keys = [buffer[start:end].lower() for start, end in spans]
+        else:
+            keys = [str(buffer[start:end], "utf-8").casefold() for start, end in spans]
+        return array("I", sorted(range(len(keys)), key=keys.__getitem__))
+
+    def next_id(self):
+        return self.ids[-1] + 1 if self.ids else 1
+
+    # The same rows numbered 1..n, as a fresh parse of their lines would number
+    # them. Returns self when the ids already run 1..n.
+    def renumbered(self):
+        if not self.ids or self.ids[-1] == len(self.ids):
+            return self
+        catalog = MovieCatalog()
+        catalog.years = array("H", self.years.tobytes())
+        catalog.genre_codes = array("H", self.genre_codes.tobytes())
+        catalog.name_offsets = array("I", self.name_offsets.tobytes())
+        catalog.name_buffer = bytearray(self.name_buffer)
+        catalog.genres = list(self.genres)
+        catalog.genre_lookup = dict(self.genre_lookup)
+        catalog.ids = array("I", range(1, len(self.ids) + 1))
+        return catalog
+
+    # Copy snapshot-backed columns into writable arrays before the first change
+    def _thaw(self):
+        if self.mapped is None:
+            return
+        self.years = array("H", self.years.tobytes())
+        self.genre_codes = array("H", self.genre_codes.tobytes())
+        self.name_offsets = array("I", self.name_offsets.tobytes())
+        self.name_buffer = bytearray(self.name_buffer)
+        self.ids = array("I", self.ids.tobytes())
+        self.mapped = None
+
+    # Append a movie; ids must keep increasing so lookups can bisect
+    def add(self, movie_id, name, genre, year):
+        self._thaw()
+        if self.ids and movie_id <= self.ids[-1]:
+            raise ValueError(f"Movie id {movie_id} must be greater than {self.ids[-1]}")
+        if not 0 <= year <= MAX_YEAR:
+            raise ValueError(f"Year must be between 0 and {MAX_YEAR}")
+
+        encoded = name.encode("utf-8")
+        code = self.genre_code(genre)
+
+        # ids go last so readers on other threads never see a half-added row.
+        # A column with a live buffer view (e.g. numpy's) cannot grow and
+        # raises BufferError; undo the columns already grown so they stay in step.
+        columns = (self.years, self.genre_codes, self.name_buffer, self.name_offsets, self.ids)
+        lengths = [len(column) for column in columns]
+        try:
+            self.years.append(year)
+            self.genre_codes.append(code)
+            self.name_buffer += encoded
+            self.name_offsets.append(len(self.name_buffer))
+            self.ids.append(movie_id)
+        except BufferError:
+            for column, length in zip(columns, lengths):
+                if len(column) > length:
+                    del column[length:]
+            raise
+
+    def values(self):
+        return (self.record(row) for row in range(len(self.ids)))
+
+    def items(self):
+        return ((movie_id, self.record(row)) for row, movie_id in enumerate(self.ids))
+
+    # Bytes held by the catalog, for comparison with dict_footprint
+    def memory_footprint(self):
+        total = sys.getsizeof(self)
+        for column in (self.ids, self.years, self.genre_codes, self.name_offsets, self.name_buffer):
+            total += column.nbytes if isinstance(column, memoryview) else sys.getsizeof(column)
+        total += sys.getsizeof(self.genres) + sys.getsizeof(self.genre_lookup)
+        total += sum(sys.getsizeof(genre) for genre in self.genres)
+        return total
+
+
+# Bytes held by a dict-of-dicts catalog, counting every key, record and value
+def dict_footprint(movies):
+    total = sys.getsizeof(movies)
+    seen = set()
+    for movie_id, movie_info in movies.items():
+        total += sys.getsizeof(movie_id) + sys.getsizeof(movie_info)
+        for key, value in movie_info.items():
+            for obj in (key, value):
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    total += sys.getsizeof(obj)
+    return total
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from movie_persistence import parse_movie_line
+
+CHUNK_LINES = 50_000
+MALFORMED_SAMPLES = 20
+# Workers must not be forked from the app: it has writer threads and holds the
+# catalog locks while importing, and a fork copies those mid-use
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+# Stream a catalog dump as (first line number, [lines]) chunks
+def read_chunks(path, chunk_lines=CHUNK_LINES):
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        chunk = []
+        start = 1
+        for line_number, line in enumerate(file, start=1):
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield start, chunk
+                chunk = []
+                start = line_number + 1
+        if chunk:
+            yield start, chunk
+
+
+# Worker: parse one chunk into records plus malformed-line counts and samples
+def parse_chunk(job):
+    start, lines = job
+    records = []
+    malformed = 0
+    samples = []
+    for offset, line in enumerate(lines):
+        movie = parse_movie_line(line)
+        if movie is not None:
+            records.append(movie)
+        elif line.strip():
+            malformed += 1
+            if len(samples) < MALFORMED_SAMPLES:
+                samples.append((start + offset, line.strip()))
+    return records, malformed, samples
+
+
+# Parse chunks on a process pool, keeping only a few chunks in flight so the
+# dump is never fully in memory. Results come back in file order.
+def _parse_parallel(chunks, workers):
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        for job in chunks:
+            pending.append(pool.submit(parse_chunk, job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Import a "Name: ... | Genre: ... | Year: ..." dump into the catalog.
+# Titles already in the catalog or repeated in the dump (case-insensitive) are
+# skipped. Returns (added ids, report dict); the caller persists the added ids
+# in one append so the whole import is a single persistence write.
+# New ids count up from first_id (default: the catalog's next id).
+def import_movies(path, catalog, workers=None, chunk_lines=CHUNK_LINES, first_id=None):
+    workers = workers or os.cpu_count() or 1
+    chunks = read_chunks(path, chunk_lines)
+
+    first = next(chunks, None)
+    if first is None:
+        results = iter(())
+    else:
+        second = next(chunks, None)
+        if second is None or workers == 1:
+            # Small dumps are parsed in-process; a pool would cost more to start
+            jobs = [first] + ([second] if second else [])
+            results = map(parse_chunk, chain(jobs, chunks))
+        else:
+            results = _parse_parallel(chain([first, second], chunks), workers)
+
+    first_id = first_id or catalog.next_id()
+    seen = {catalog.name_at(row).lower() for row in range(len(catalog))}
+    report = {"imported": 0, "duplicates": 0, "malformed": 0, "malformed_samples": []}
+    added_ids = []
+
+    for records, malformed, samples in results:
+        report["malformed"] += malformed
+        room = MALFORMED_SAMPLES - len(report["malformed_samples"])
+        report["malformed_samples"] += samples[:room]
+
+        for name, genre, year in records:
+            key = name.lower()
+            if key in seen:
+                report["duplicates"] += 1
+                continue
+            seen.add(key)
+            movie_id = first_id + len(added_ids)
+            catalog.add(movie_id, name, genre, year)
+            added_ids.append(movie_id)
+
+    report["imported"] = len(added_ids)
+    return added_ids, report
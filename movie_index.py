@@ -0,0 +1,166 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+GRAM_SIZE = 3
+
+
+# Break a lowercase title into its distinct n-grams. Padding adds grams for
+# the start and end of the title, which helps ranked matching of short words.
+def title_grams(text, size=GRAM_SIZE, padded=False):
+    if padded:
+        text = " " * (size - 1) + text + " " * (size - 1)
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+# Check whether a sorted posting list contains a movie id
+def _contains(postings, movie_id):
+    pos = bisect_left(postings, movie_id)
+    return pos < len(postings) and postings[pos] == movie_id
+
+
+# Inverted trigram index over movie names for substring search
+class TrigramIndex:
+    def __init__(self):
+        self.postings = {}
+        self.sizes = array("H")
+        self.ready = False
+
+    # Drop all postings; the owner rebuilds the index on its next query
+    def clear(self):
+        self.postings = {}
+        self.sizes = array("H")
+        self.ready = False
+
+    def __len__(self):
+        return len(self.postings)
+
+    # Add one movie name to the index
+    # Padded grams are a superset of the plain ones, so substring lookups still work
+    def add(self, movie_id, name):
+        grams = title_grams(name.lower(), padded=True)
+
+        # Distinct trigram count per id, used to score ranked matches
+        if movie_id >= len(self.sizes):
+            self.sizes.extend([0] * (movie_id + 1 - len(self.sizes)))
+        self.sizes[movie_id] = min(len(grams), 65535)
+
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                self.postings[gram] = array("I", [movie_id])
+            elif postings[-1] < movie_id:
+                postings.append(movie_id)
+            elif not _contains(postings, movie_id):
+                insort(postings, movie_id)
+
+    # Rebuild the index from an id -> movie mapping
+    def build(self, movies):
+        self.clear()
+        for movie_id, movie_info in movies.items():
+            self.add(movie_id, movie_info["name"])
+        self.ready = True
+
+    # Ids of movies that contain every trigram of the query, in id order.
+    # Returns None when the query is too short to narrow the search.
+    def candidates(self, query):
+        grams = title_grams(query.lower())
+        if not grams:
+            return None
+
+        lists = []
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                return []
+            lists.append(postings)
+        lists.sort(key=len)
+
+        result = lists[0]
+        for postings in lists[1:]:
+            # Probe small candidate sets by bisection, merge similar-sized ones through a set
+            if len(result) * 16 < len(postings):
+                result = [movie_id for movie_id in result if _contains(postings, movie_id)]
+            else:
+                result = sorted(set(result).intersection(postings))
+            if not result:
+                break
+        return list(result)
+
+
+# Movie ids bucketed by year, with the distinct years kept sorted for bisect.
+# Range queries cost O(log n) to find the first year plus O(k) to stream ids.
+class YearIndex:
+    def __init__(self):
+        self.years = []
+        self.buckets = {}
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def add(self, movie_id, year):
+        bucket = self.buckets.get(year)
+        if bucket is None:
+            self.buckets[year] = array("I", [movie_id])
+            insort(self.years, year)
+        else:
+            bucket.append(movie_id)
+
+    # Number of ids with year_min <= year <= year_max (None means unbounded)
+    def count(self, year_min=None, year_max=None):
+        return sum(len(self.buckets[year]) for year in self._years_between(year_min, year_max))
+
+    def _years_between(self, year_min, year_max):
+        start = 0 if year_min is None else bisect_left(self.years, year_min)
+        stop = len(self.years) if year_max is None else bisect_right(self.years, year_max)
+        return self.years[start:stop]
+
+    # Stream ids ordered by year, then id, skipping the first offset matches
+    def range_ids(self, year_min=None, year_max=None, offset=0):
+        for year in self._years_between(year_min, year_max):
+            bucket = self.buckets[year]
+            if offset >= len(bucket):
+                offset -= len(bucket)
+                continue
+            for position in range(offset, len(bucket)):
+                yield bucket[position]
+            offset = 0
+
+
+# Secondary indexes for browsing: one YearIndex over the whole catalog and one
+# per genre, so "all Horror from 1990-2000" is a bisect plus a bucket walk.
+class BrowseIndex:
+    def __init__(self):
+        self.by_year = YearIndex()
+        self.by_genre = {}
+        self.ready = False
+
+    def clear(self):
+        self.by_year = YearIndex()
+        self.by_genre = {}
+        self.ready = False
+
+    def add(self, movie_id, genre, year):
+        self.by_year.add(movie_id, year)
+        genre_years = self.by_genre.get(genre)
+        if genre_years is None:
+            genre_years = self.by_genre[genre] = YearIndex()
+        genre_years.add(movie_id, year)
+
+    # Rebuild from a MovieCatalog's columns without decoding any names
+    def build(self, catalog):
+        self.clear()
+        for row, movie_id in enumerate(catalog.ids):
+            self.add(movie_id, catalog.genres[catalog.genre_codes[row]], catalog.years[row])
+        self.ready = True
+
+    def _year_index(self, genre):
+        if genre is None:
+            return self.by_year
+        return self.by_genre.get(genre, YearIndex())
+
+    def count(self, genre=None, year_min=None, year_max=None):
+        return self._year_index(genre).count(year_min, year_max)
+
+    # Ids matching the filters, ordered by year then id
+    def query(self, genre=None, year_min=None, year_max=None, offset=0):
+        return self._year_index(genre).range_ids(year_min, year_max, offset)
@@ -0,0 +1,184 @@
+import os
+import tempfile
+import threading
+
+from movie_catalog import MAX_YEAR
+
+FSYNC_ALWAYS = "always"
+FSYNC_BATCH = "batch"
+FSYNC_INTERVAL = "interval"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_INTERVAL)
+# os.umask can only be read by setting it, so do that once while importing
+# rather than racing other threads that create files later
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+# One listmovie.txt line for a movie record
+def format_movie_line(movie_info):
+    return f"Name: {movie_info['name']} | Genre: {movie_info['genre']} | Year: {movie_info['year']}\n"
+
+
+# Parse a "Name: ... | Genre: ... | Year: ..." line into (name, genre, year),
+# or None if the line is malformed
+def parse_movie_line(line):
+    line = line.strip()
+    if not line or "| Genre:" not in line or "| Year:" not in line:
+        return None
+
+    try:
+        parts = line.split(" | ")
+        name = parts[0].split(": ")[1]
+        genre = parts[1].split(": ")[1]
+        year = int(parts[2].split(": ")[1])
+    except (IndexError, ValueError):
+        return None
+
+    if not 0 <= year <= MAX_YEAR:
+        return None
+    return name, genre, year
+
+
+# Make a rename inside a directory durable
+def _fsync_directory(path):
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Permission bits for a rewritten file: keep the old file's, or give a new file
+# what open() would have, since mkstemp always creates it 0600
+def _file_mode(path):
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+# Replace a file with new contents without ever exposing a half-written file
+def atomic_write_lines(path, lines, binary=False):
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "wb" if binary else "w") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, _file_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _fsync_directory(path)
+
+
+# Append-only writer for a line-based data file.
+#   always   - fsync after every append
+#   batch    - fsync once every batch_size appended lines
+#   interval - fsync from a background thread every interval seconds
+class AppendLog:
+    def __init__(self, path, fsync_policy=FSYNC_BATCH, batch_size=100, interval=1.0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.batch_size = batch_size
+        self.interval = interval
+        self.garbage_lines = 0
+        # Called (under lock) after every rewrite, e.g. to note the new file's stat
+        self.on_rewrite = None
+        self.lock = threading.RLock()
+        self._file = None
+        self._unsynced = 0
+        self._stop = threading.Event()
+        self._syncer = None
+        self._compactor = None
+
+    def _open(self):
+        if self._file is None:
+            needs_newline = False
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    needs_newline = existing.read(1) != b"\n"
+            self._file = open(self.path, "a")
+            if needs_newline:
+                self._file.write("\n")
+            if self.fsync_policy == FSYNC_INTERVAL and self._syncer is None:
+                self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+                self._syncer.start()
+        return self._file
+
+    # Append lines with a single write, then fsync according to the policy
+    def append_many(self, lines):
+        with self.lock:
+            file = self._open()
+            file.write("".join(lines))
+            file.flush()
+            self._unsynced += len(lines)
+            if self.fsync_policy == FSYNC_ALWAYS:
+                self._fsync()
+            elif self.fsync_policy == FSYNC_BATCH and self._unsynced >= self.batch_size:
+                self._fsync()
+
+    def append(self, line):
+        self.append_many([line])
+
+    def _fsync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def sync(self):
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+            self._fsync()
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    # Full rewrite through a temp file and rename; appends continue on the new file
+    def rewrite(self, lines):
+        with self.lock:
+            self._close_file()
+            atomic_write_lines(self.path, lines)
+            self.garbage_lines = 0
+            if self.on_rewrite is not None:
+                self.on_rewrite()
+
+    # Periodically call compact() (which should rewrite the file) while it holds garbage lines
+    def start_compactor(self, interval, compact):
+        if self._compactor is not None:
+            return
+
+        def compact_loop():
+            while not self._stop.wait(interval):
+                if self.garbage_lines:
+                    compact()
+
+        self._compactor = threading.Thread(target=compact_loop, daemon=True)
+        self._compactor.start()
+
+    # Close the current handle so the next append opens the file at path again
+    # (e.g. after another process replaced it)
+    def reopen(self):
+        with self.lock:
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self._stop.set()
+        with self.lock:
+            self._close_file()
@@ -0,0 +1,105 @@
+import heapq
+from collections import Counter
+
+from lazy_import import optional_module
+from movie_index import title_grams
+
+
+# Score titles with the vectorized kernel: count shared trigrams over the
+# postings with unique, turn them into Dice scores and pick the top k with
+# argpartition. Only candidate ids are touched, never whole catalog columns.
+def _ranked_numpy(catalog, index, grams, k, genre, year_min, year_max):
+    np = optional_module("numpy")
+    postings = [np.frombuffer(index.postings[gram], dtype=np.uint32) for gram in grams if gram in index.postings]
+    if not postings:
+        return []
+
+    movie_ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+
+    # Filters look up each candidate's row by bisecting the sorted ids column
+    if genre is not None or year_min is not None or year_max is not None:
+        code = None
+        if genre is not None:
+            code = catalog.genre_lookup.get(genre)
+            if code is None:
+                return []
+        ids = np.frombuffer(catalog.ids, dtype=np.uint32)
+        if len(ids) and int(ids[-1]) - int(ids[0]) == len(ids) - 1:
+            # Gapless ids: the row is just an offset, no search needed
+            found = (movie_ids >= ids[0]) & (movie_ids <= ids[-1])
+            movie_ids, shared = movie_ids[found], shared[found]
+            rows = movie_ids - ids[0]
+        else:
+            rows = np.searchsorted(ids, movie_ids)
+            found = rows < len(ids)
+            found[found] = ids[rows[found]] == movie_ids[found]
+            movie_ids, shared, rows = movie_ids[found], shared[found], rows[found]
+        keep = np.ones(len(rows), dtype=bool)
+        if code is not None:
+            keep &= np.frombuffer(catalog.genre_codes, dtype=np.uint16)[rows] == code
+        if year_min is not None or year_max is not None:
+            years = np.frombuffer(catalog.years, dtype=np.uint16)[rows]
+            if year_min is not None:
+                keep &= years >= year_min
+            if year_max is not None:
+                keep &= years <= year_max
+        movie_ids, shared = movie_ids[keep], shared[keep]
+
+    sizes = np.frombuffer(index.sizes, dtype=np.uint16)[movie_ids]
+    scores = 2.0 * shared / (len(grams) + sizes)
+
+    # Keep everything tied with the k-th best score so ties break by id
+    if len(movie_ids) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= kth
+        movie_ids, scores = movie_ids[keep], scores[keep]
+    order = np.lexsort((movie_ids, -scores))[:k]
+    return [(float(scores[i]), int(movie_ids[i])) for i in order]
+
+
+# Pure Python fallback: Counter for shared trigrams, heap for the top k
+def _ranked_python(catalog, index, grams, k, genre, year_min, year_max):
+    shared = Counter()
+    for gram in grams:
+        shared.update(index.postings.get(gram, ()))
+
+    code = None
+    if genre is not None:
+        code = catalog.genre_lookup.get(genre)
+        if code is None:
+            return []
+    filtering = code is not None or year_min is not None or year_max is not None
+
+    def allowed(movie_id):
+        row = catalog.row_of(movie_id)
+        if row is None:
+            # Indexed but no longer in this catalog (e.g. mid-reload)
+            return False
+        if code is not None and catalog.genre_codes[row] != code:
+            return False
+        year = catalog.years[row]
+        return (year_min is None or year >= year_min) and (year_max is None or year <= year_max)
+
+    scored = (
+        (2.0 * count / (len(grams) + index.sizes[movie_id]), -movie_id)
+        for movie_id, count in shared.items()
+        if not filtering or allowed(movie_id)
+    )
+    return [(score, -negative_id) for score, negative_id in heapq.nlargest(k, scored)]
+
+
+# Top k titles for a possibly misspelled query, best first, as (score, id, record).
+# Titles are scored by trigram overlap (Dice coefficient), so a typo only costs
+# the few trigrams it touches. Optional genre and year range filters.
+def ranked_search(catalog, index, query, k=10, genre=None, year_min=None, year_max=None):
+    grams = title_grams(query.lower(), padded=True)
+    if not query.strip() or k <= 0:
+        return []
+
+    if optional_module("numpy") is not None:
+        ranked = _ranked_numpy(catalog, index, grams, k, genre, year_min, year_max)
+    else:
+        ranked = _ranked_python(catalog, index, grams, k, genre, year_min, year_max)
+    # Ids the index has but the catalog no longer does are skipped
+    rows = ((score, movie_id, catalog.row_of(movie_id)) for score, movie_id in ranked)
+    return [(score, movie_id, catalog.record(row)) for score, movie_id, row in rows if row is not None]
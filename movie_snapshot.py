@@ -0,0 +1,97 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from movie_catalog import MovieCatalog
+from movie_persistence import atomic_write_lines
+
+SNAPSHOT_MAGIC = b"MOVSNAP1"
+SNAPSHOT_VERSION = 1
+
+# magic, version, byte order, movie count, genre count, malformed source lines,
+# source size, source mtime_ns, then the offset of each section in the file
+HEADER = struct.Struct("<8sIIIIIQQ6Q")
+SECTIONS = ("ids", "years", "genre_codes", "name_offsets", "name_heap", "genre_table")
+BYTE_ORDER = {"little": 1, "big": 2}[sys.byteorder]
+
+
+def _pad(size):
+    return b"\0" * (-size % 4)
+
+
+# Write the catalog as a binary snapshot of the given source text file
+def write_snapshot(path, catalog, source_path, malformed=0):
+    genre_offsets = array("I", [0])
+    genre_heap = bytearray()
+    for genre in catalog.genres:
+        genre_heap += genre.encode("utf-8")
+        genre_offsets.append(len(genre_heap))
+
+    sections = [
+        bytes(catalog.ids),
+        bytes(catalog.years),
+        bytes(catalog.genre_codes),
+        bytes(catalog.name_offsets),
+        bytes(catalog.name_buffer),
+        bytes(genre_offsets) + bytes(genre_heap),
+    ]
+
+    chunks = []
+    offsets = []
+    position = HEADER.size
+    for data in sections:
+        offsets.append(position)
+        chunks.append(data + _pad(len(data)))
+        position += len(chunks[-1])
+
+    stat = os.stat(source_path)
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTE_ORDER, len(catalog), len(catalog.genres),
+                         malformed, stat.st_size, stat.st_mtime_ns, *offsets)
+    atomic_write_lines(path, [header] + chunks, binary=True)
+
+
+# Open a snapshot with mmap. Returns (catalog, malformed), or None when the
+# snapshot is missing, damaged or older than the source text file.
+def load_snapshot(path, source_path):
+    if not os.path.exists(path) or not os.path.exists(source_path):
+        return None
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            return None
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    fields = HEADER.unpack_from(mapped)
+    magic, version, byte_order, count, genre_count, malformed, source_size, source_mtime = fields[:8]
+    stat = os.stat(source_path)
+    if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or byte_order != BYTE_ORDER
+            or source_size != stat.st_size or source_mtime != stat.st_mtime_ns):
+        mapped.close()
+        return None
+
+    offsets = dict(zip(SECTIONS, fields[8:]))
+    view = memoryview(mapped)
+
+    def column(name, typecode, length):
+        start = offsets[name]
+        return view[start:start + length * array(typecode).itemsize].cast(typecode)
+
+    catalog = MovieCatalog()
+    catalog.ids = column("ids", "I", count)
+    catalog.years = column("years", "H", count)
+    catalog.genre_codes = column("genre_codes", "H", count)
+    catalog.name_offsets = column("name_offsets", "I", count + 1)
+    heap_start = offsets["name_heap"]
+    catalog.name_buffer = view[heap_start:heap_start + catalog.name_offsets[-1]]
+
+    genre_offsets = column("genre_table", "I", genre_count + 1)
+    genre_heap = offsets["genre_table"] + genre_offsets.nbytes
+    for i in range(genre_count):
+        genre = str(view[genre_heap + genre_offsets[i]:genre_heap + genre_offsets[i + 1]], "utf-8")
+        catalog.genres.append(genre)
+        catalog.genre_lookup[genre] = i
+
+    catalog.mapped = mapped
+    return catalog, malformed
@@ -0,0 +1,34 @@
+import sys
+from itertools import islice
+
+PAGE_SIZE = 50
+MORE_PROMPT = "Press Enter for more, or q to stop: "
+
+
+# Cut a stream of rows into lists of at most page_size, flagging whether more follow.
+# Only one page beyond the current one is ever pulled from the stream.
+def pages(rows, page_size=PAGE_SIZE):
+    rows = iter(rows)
+    page = list(islice(rows, page_size))
+    while page:
+        following = list(islice(rows, page_size))
+        yield page, bool(following)
+        page = following
+
+
+def ask_more():
+    return input(MORE_PROMPT).strip().lower() != 'q'
+
+
+# Format rows page by page and write each page to out in a single call, asking
+# more() before every page but the first. Returns how many rows were shown.
+def render_pages(rows, format_row, page_size=PAGE_SIZE, out=None, more=ask_more):
+    out = out or sys.stdout
+    shown = 0
+    for page, has_more in pages(rows, page_size):
+        out.write("".join(format_row(*row) for row in page))
+        out.flush()
+        shown += len(page)
+        if not has_more or (more is not None and not more()):
+            break
+    return shown
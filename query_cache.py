@@ -0,0 +1,101 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# Rough in-memory size of a list of movie dicts, for the cache's byte budget
+def results_size(results):
+    total = sys.getsizeof(results)
+    for movie in results:
+        total += sys.getsizeof(movie) + sys.getsizeof(movie["name"]) + sys.getsizeof(movie["genre"])
+    return total
+
+
+# LRU cache of search results keyed on the normalized query, bounded by entry
+# count and an approximate byte budget, with entries expiring after ttl seconds.
+# Every entry belongs to one catalog generation: when the caller passes a newer
+# generation (after an add, import or reload) the whole cache is dropped, so a
+# hit never returns results from an older catalog. Cached lists are shared
+# between callers and must not be modified.
+class QueryCache:
+    def __init__(self, max_entries=1024, max_bytes=8 * 1024 * 1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query):
+        return query.lower()
+
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.bytes = 0
+            self.generation = generation
+
+    # Cached results for a query, or None on a miss
+    def get(self, query, generation):
+        key = self.normalize(query)
+        with self.lock:
+            self._check_generation(generation)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, results = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                self.bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def put(self, query, generation, results):
+        key = self.normalize(query)
+        size = results_size(results)
+        with self.lock:
+            self._check_generation(generation)
+            if size > self.max_bytes:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.entries[key] = (time.monotonic() + self.ttl, size, results)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
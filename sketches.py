@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import math
+from array import array
+
+
+# Two independent 64-bit hashes of a string, the same in every process
+def hash_pair(key):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+def _encode(values):
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode(typecode, text):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text))
+    return values
+
+
+# Count-Min sketch: depth rows of width counters. estimate() never undercounts
+# and overcounts by at most about total/width with high probability. Sketches
+# with the same shape merge by adding their counters.
+class CountMinSketch:
+    def __init__(self, width=4096, depth=4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.counts = array("Q", bytes(8 * width * depth))
+
+    def _cells(self, key):
+        first, second = hash_pair(key)
+        return [row * self.width + (first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        self.total += count
+        cells = self._cells(key)
+        for cell in cells:
+            self.counts[cell] += count
+        return min(self.counts[cell] for cell in cells)
+
+    def estimate(self, key):
+        return min(self.counts[cell] for cell in self._cells(key))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Count-Min sketches of different shapes cannot be merged")
+        self.total += other.total
+        for cell, count in enumerate(other.counts):
+            if count:
+                self.counts[cell] += count
+
+    def to_state(self):
+        return {"width": self.width, "depth": self.depth, "total": self.total, "counts": _encode(self.counts)}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state["width"], state["depth"])
+        sketch.total = state["total"]
+        sketch.counts = _decode("Q", state["counts"])
+        return sketch
+
+
+# HyperLogLog distinct counter with 2**precision one-byte registers; the
+# standard error is about 1.04 / sqrt(2**precision), 1.6% at the default.
+# Merging takes the larger register of each pair.
+class HyperLogLog:
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, key):
+        value = hash_pair(key)[0]
+        register = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def count(self):
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Small cardinalities: linear counting is more accurate
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLogs of different precision cannot be merged")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def to_state(self):
+        return {"precision": self.precision, "registers": base64.b64encode(self.registers).decode("ascii")}
+
+    @classmethod
+    def from_state(cls, state):
+        hll = cls(state["precision"])
+        hll.registers = bytearray(base64.b64decode(state["registers"]))
+        return hll
+
+
+# Heavy hitters: a Count-Min sketch plus the capacity keys with the highest
+# estimates seen so far. A key enters the candidates when its estimate beats
+# the smallest one kept; merged candidates are re-estimated on the merged sketch.
+class TopK:
+    def __init__(self, capacity=1000, width=4096, depth=4):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = {}
+        # At most the smallest kept estimate; estimates only grow, so it can lag
+        self._floor = 0
+
+    def add(self, key, count=1):
+        estimate = self.sketch.add(key, count)
+        if key in self.candidates or len(self.candidates) < self.capacity:
+            self.candidates[key] = estimate
+            return
+        if estimate <= self._floor:
+            return
+        smallest = min(self.candidates, key=self.candidates.get)
+        self._floor = self.candidates[smallest]
+        if estimate > self._floor:
+            del self.candidates[smallest]
+            self.candidates[key] = estimate
+
+    def estimate(self, key):
+        return self.sketch.estimate(key)
+
+    def _trim(self):
+        if len(self.candidates) > self.capacity:
+            kept = sorted(self.candidates.items(), key=lambda item: -item[1])[:self.capacity]
+            self.candidates = dict(kept)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {key: self.sketch.estimate(key) for key in keys}
+        self._trim()
+        self._floor = 0
+
+    # The n heaviest keys as (key, estimated count), heaviest first
+    def top(self, n):
+        return sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+    def to_state(self):
+        return {"capacity": self.capacity, "sketch": self.sketch.to_state(), "candidates": self.candidates}
+
+    @classmethod
+    def from_state(cls, state):
+        top = cls(state["capacity"])
+        top.sketch = CountMinSketch.from_state(state["sketch"])
+        top.candidates = dict(state["candidates"])
+        top._trim()
+        return top
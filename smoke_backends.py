@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from storage import SQLITE, TEXT
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKENDS = (TEXT, SQLITE)
+
+# One pass over the app paths both backends must support, run through main in a
+# fresh process because main picks its backend when it is imported
+PROBE = """
+import main
+
+main.load_movies_from_file()
+assert main.create_account("smoke", "password"), "register failed"
+assert main.authenticate("smoke", "password"), "login failed"
+assert not main.authenticate("smoke", "wrong"), "login accepted a wrong password"
+
+first = main.add_movie_record("Smoke Signals", "Drama", 1998)
+second = main.add_movie_record("Smokey Joe", "Comedy", 2001)
+assert second > first, "movie ids did not increase"
+assert [movie["name"] for movie in main.search_movie("smoke")] == ["Smoke Signals", "Smokey Joe"], "search failed"
+assert [movie_id for movie_id, _ in main.browse_movies("Comedy")] == [second], "browse failed"
+
+with open("dump.txt", "w") as file:
+    file.write("Name: Smoke Screen | Genre: Thriller | Year: 2010\\nnot a movie\\n")
+report = main.bulk_import_movies("dump.txt")
+assert (report["imported"], report["malformed"]) == (1, 1), f"bulk import failed: {report}"
+
+store = main.get_todo_store("smoke")
+task_id = main.log_todo_list_task("smoke", "water plants", "2026-10-18")
+later_id = main.log_todo_list_task("smoke", "call home", "2026-10-20")
+assert store.get(task_id) == ("water plants", "2026-10-18"), "todo add failed"
+store.complete(task_id, "2026-10-18 12:00:00")
+assert store.get(task_id) is None and store.next_due()[0] == later_id, "todo complete failed"
+
+main.log_user_interaction("smoke", "smoke test")
+main.log_writer.flush()
+assert main.storage.log_tail("smoke", main.USER_LOG, 1)[0].endswith("smoke test\\n"), "log read failed"
+"""
+
+
+# Run the probe against every backend; returns {backend: error output or None}
+def run(backends=BACKENDS):
+    failures = {}
+    for backend in backends:
+        workdir = tempfile.mkdtemp(prefix=f"smoke_{backend}_")
+        env = dict(os.environ, PYTHONPATH=HERE, APP_STORAGE=backend, KDF_ITERATIONS="1000")
+        result = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir, env=env,
+                                capture_output=True, text=True)
+        failures[backend] = result.stderr.strip() or "failed" if result.returncode else None
+    return failures
+
+
+# Exit with an error if any backend fails the probe; the benches call this first
+def check_backends(backends=BACKENDS):
+    failures = {backend: error for backend, error in run(backends).items() if error}
+    for backend, error in failures.items():
+        print(f"SMOKE FAILED ({backend}):\n{error}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    check_backends()
+    print(f"Smoke test passed: {', '.join(BACKENDS)}")
@@ -0,0 +1,476 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from catalog_manager import APPENDED, RELOADED, UNCHANGED, CatalogManager
+from credentials import KDF_ITERATIONS, CredentialStore, hash_password, needs_rehash, verify_password
+from log_rotation import LogHistory, as_timestamp, line_timestamp
+from log_writer import LogWriter
+from movie_catalog import MovieCatalog
+from movie_persistence import FSYNC_BATCH, AppendLog
+from todo_store import TodoStore
+
+TEXT = "text"
+SQLITE = "sqlite"
+
+# Kinds of per-user log; the text backend keeps each in user_logs/<user>/<kind>.txt
+USER_LOG = "user_log"
+SEARCH_LOG = "search_movies"
+GUESS_LOG = "number_guessing_log"
+CALCULATION_LOG = "calculation_history"
+LOG_KINDS = (USER_LOG, SEARCH_LOG, GUESS_LOG, CALCULATION_LOG)
+
+# Both backends offer the same surface to main.py:
+#   credentials                 verify(), register(), exists()
+#   catalog                     a catalog manager: refresh(), writing(), next_id(), append(),
+#                               rewrite(), ...
+#   log_writer                  buffered writes, flush(), close()
+#   todo_store(username)        add(), complete(), get(), list(), next_due()
+#   write_log(username, kind, text), has_accounts(), has_user(), create_user(),
+#   prepare_user(), flush(), close()
+#   log_tail(username, kind, n), log_between(username, kind, start, end)
+#                               read a log back; times are "YYYY-mm-dd HH:MM:SS"
+
+
+# The original flat files: user_credentials.txt, listmovie.txt and per-user
+# text files under user_logs/
+class TextFileBackend:
+    name = TEXT
+
+    def __init__(self, credentials_path, logs_folder, movies_path, snapshot_path, parse_movies,
+                 fsync_policy=FSYNC_BATCH, rotation=None):
+        self.credentials_path = credentials_path
+        self.logs_folder = logs_folder
+        # Users whose folder is known to exist; folders are never removed while
+        # the app runs, so each is checked on disk once per process
+        self.verified_users = set()
+        self.credentials = CredentialStore(credentials_path)
+        self.log_writer = LogWriter(rotation=rotation)
+        movie_log = AppendLog(movies_path, fsync_policy=fsync_policy)
+        self.catalog = CatalogManager(movies_path, snapshot_path, movie_log, parse_movies)
+
+    def user_folder(self, username):
+        return os.path.join(self.logs_folder, username)
+
+    def has_accounts(self):
+        return os.path.exists(self.credentials_path)
+
+    def has_user(self, username):
+        if username in self.verified_users:
+            return True
+        if os.path.exists(self.user_folder(username)):
+            self.verified_users.add(username)
+            return True
+        return False
+
+    # The user's log folder with its starter files
+    def create_user(self, username):
+        folder_path = self.user_folder(username)
+        os.makedirs(folder_path, exist_ok=True)
+
+        user_log_file = os.path.join(folder_path, 'user_log.txt')
+        todo_list_file = os.path.join(folder_path, 'todo_list.txt')
+        number_guessing_log_file = os.path.join(folder_path, 'number_guessing_log.txt')
+
+        if not os.path.exists(user_log_file):
+            with open(user_log_file, 'w') as f:
+                f.write("User log started.\n")
+
+        if not os.path.exists(todo_list_file):
+            with open(todo_list_file, 'w') as f:
+                f.write("To-Do List (incomplete tasks)\n")
+
+        if not os.path.exists(number_guessing_log_file):
+            with open(number_guessing_log_file, 'w') as f:
+                f.write("Number Guessing Game Log\n")
+
+        self.verified_users.add(username)
+        return folder_path
+
+    # Make sure logs can be written for a user that may predate their folder
+    def prepare_user(self, username):
+        if username not in self.verified_users:
+            os.makedirs(self.user_folder(username), exist_ok=True)
+            self.verified_users.add(username)
+
+    def write_log(self, username, kind, text):
+        return self.log_writer.write(os.path.join(self.user_folder(username), f"{kind}.txt"), text)
+
+    def _log_history(self, username, kind):
+        self.log_writer.flush()
+        return LogHistory(os.path.join(self.user_folder(username), f"{kind}.txt"))
+
+    def log_tail(self, username, kind, n):
+        if not self.has_user(username):
+            return []
+        return self._log_history(username, kind).tail(n)
+
+    def log_between(self, username, kind, start=None, end=None):
+        if not self.has_user(username):
+            return []
+        return self._log_history(username, kind).between(start, end)
+
+    def todo_store(self, username):
+        folder_path = self.user_folder(username)
+        todo_file = os.path.join(folder_path, 'todo_list.txt')
+        completed_file = os.path.join(folder_path, 'completed_task.txt')
+        self.prepare_user(username)
+        for path in (todo_file, completed_file):
+            if not os.path.exists(path):
+                open(path, 'a').close()
+        return TodoStore(todo_file, completed_file)
+
+    def flush(self):
+        self.log_writer.flush()
+
+    def close(self):
+        self.log_writer.close()
+        self.catalog.close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    year INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movies_name ON movies (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS movies_genre_year ON movies (genre, year);
+CREATE INDEX IF NOT EXISTS movies_year ON movies (year);
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    task TEXT NOT NULL,
+    deadline TEXT NOT NULL,
+    completed_on TEXT
+);
+CREATE INDEX IF NOT EXISTS todos_user ON todos (username, completed_on, deadline);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    ts TEXT
+);
+"""
+# Databases made before logs had a ts column get it here, filled in from each
+# entry's leading "YYYY-mm-dd HH:MM:SS" (NULL when there is none)
+LOGS_TS_UPGRADE = (
+    "ALTER TABLE logs ADD COLUMN ts TEXT",
+    "UPDATE logs SET ts = substr(entry, 1, 19)"
+    " WHERE entry GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]*'",
+)
+# Also serves (username, kind) lookups, so it replaces the older index on those
+LOGS_TS_INDEX = (
+    "CREATE INDEX IF NOT EXISTS logs_user_kind_ts ON logs (username, kind, ts)",
+    "DROP INDEX IF EXISTS logs_user_kind",
+)
+
+
+# Everything in one SQLite database in WAL mode, so readers never block the
+# writer and several processes can share it. Each thread gets its own
+# connection; statements are fixed parameterized strings, which sqlite3 keeps
+# prepared in its per-connection statement cache.
+class SQLiteBackend:
+    name = SQLITE
+
+    def __init__(self, path, iterations=KDF_ITERATIONS):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+        self.credentials = SQLiteCredentialStore(self, iterations)
+        self.log_writer = SQLiteLogWriter(self)
+        self.catalog = SQLiteCatalogManager(self)
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connections_lock:
+                if not self._schema_ready:
+                    connection.executescript(SCHEMA)
+                    self._upgrade_logs(connection)
+                    self._schema_ready = True
+                self._connections.append(connection)
+            self._local.connection = connection
+        return connection
+
+    # Add the ts column to an older logs table; checked again under the write
+    # lock in case another process is doing the same
+    def _upgrade_logs(self, connection):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if "ts" not in [row[1] for row in connection.execute("PRAGMA table_info(logs)")]:
+                for statement in LOGS_TS_UPGRADE:
+                    connection.execute(statement)
+            for statement in LOGS_TS_INDEX:
+                connection.execute(statement)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # BEGIN IMMEDIATE ... COMMIT, taking the database write lock up front.
+    # Nested use joins the outer transaction.
+    @contextmanager
+    def transaction(self):
+        connection = self.connection()
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def has_accounts(self):
+        return self.connection().execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None
+
+    def has_user(self, username):
+        return self.credentials.exists(username)
+
+    def create_user(self, username):
+        return None
+
+    def prepare_user(self, username):
+        pass
+
+    def write_log(self, username, kind, text):
+        return self.log_writer.write((username, kind), text)
+
+    def log_tail(self, username, kind, n):
+        self.log_writer.flush()
+        rows = self.connection().execute(
+            "SELECT entry FROM logs WHERE username = ? AND kind = ? ORDER BY id DESC LIMIT ?", (username, kind, n),
+        ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    # Entries are filtered by their leading timestamp, as in the text backend,
+    # through the (username, kind, ts) index; entries without one are all returned
+    def log_between(self, username, kind, start=None, end=None):
+        self.log_writer.flush()
+        start, end = as_timestamp(start), as_timestamp(end)
+        rows = self.connection().execute(
+            "SELECT id, entry FROM logs WHERE username = ? AND kind = ? AND ts >= ? AND ts <= ?"
+            " UNION ALL SELECT id, entry FROM logs WHERE username = ? AND kind = ? AND ts IS NULL ORDER BY id",
+            (username, kind, start or "", end or "\uffff", username, kind),
+        )
+        return [entry for _, entry in rows]
+
+    def todo_store(self, username):
+        return SQLiteTodoStore(self, username)
+
+    def flush(self):
+        self.log_writer.flush()
+
+    def close(self):
+        self.log_writer.close()
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+# CredentialStore over the users table; the primary key settles races between
+# processes registering the same name
+class SQLiteCredentialStore:
+    def __init__(self, db, iterations=KDF_ITERATIONS):
+        self.db = db
+        self.iterations = iterations
+        self._dummy = None
+
+    def _stored(self, username):
+        row = self.db.connection().execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def exists(self, username):
+        return self._stored(username) is not None
+
+    def verify(self, username, password):
+        stored = self._stored(username)
+        if stored is None:
+            if self._dummy is None:
+                self._dummy = hash_password("", self.iterations)
+            verify_password(password, self._dummy)
+            return False
+        if not verify_password(password, stored):
+            return False
+
+        if needs_rehash(stored, self.iterations):
+            # Skip if the password changed elsewhere since it was checked
+            self.db.connection().execute(
+                "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                (hash_password(password, self.iterations), username, stored),
+            )
+        return True
+
+    # Add a new user; returns False when the username is already taken
+    def register(self, username, password):
+        if self.exists(username):
+            return False
+        cursor = self.db.connection().execute(
+            "INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+            (username, hash_password(password, self.iterations)),
+        )
+        return cursor.rowcount == 1
+
+
+# Catalog manager over the movies table. Movies are only ever appended with
+# increasing ids, so max(id) (one index lookup) tells whether anything changed
+# and "id > last seen" is exactly what another process added.
+class SQLiteCatalogManager:
+    def __init__(self, db):
+        self.db = db
+        self.lock = threading.RLock()
+        self.catalog = MovieCatalog()
+        self.generation = 0
+        self.loaded = False
+        self.max_id = 0
+
+    def _latest(self):
+        return self.db.connection().execute("SELECT max(id) FROM movies").fetchone()[0] or 0
+
+    def is_current(self):
+        return self.loaded and self._latest() == self.max_id
+
+    def refresh(self):
+        with self.lock:
+            latest = self._latest()
+            if self.loaded and latest == self.max_id:
+                return UNCHANGED, []
+
+            connection = self.db.connection()
+            if not self.loaded:
+                self.catalog = MovieCatalog()
+                rows = connection.execute("SELECT id, name, genre, year FROM movies ORDER BY id")
+                for row in rows:
+                    self.catalog.add(*row)
+                self.loaded = True
+                self.max_id = latest
+                self.generation += 1
+                return RELOADED, []
+
+            added_ids = []
+            rows = connection.execute("SELECT id, name, genre, year FROM movies WHERE id > ? ORDER BY id",
+                                      (self.max_id,))
+            for movie_id, name, genre, year in rows:
+                self.catalog.add(movie_id, name, genre, year)
+                added_ids.append(movie_id)
+            self.max_id = max(self.max_id, latest)
+            self.generation += 1
+            return APPENDED, added_ids
+
+    # Hold the database write lock for a catch-up followed by a write
+    @contextmanager
+    def writing(self):
+        with self.lock, self.db.transaction():
+            yield
+
+    # Id for the next movie this process adds (call inside writing())
+    def next_id(self):
+        return max(self.max_id, self.catalog.next_id() - 1) + 1
+
+    # Persist movies already added to the catalog (call inside writing())
+    def append(self, movie_ids, sync=False):
+        rows = [(movie_id, movie["name"], movie["genre"], movie["year"])
+                for movie_id, movie in ((movie_id, self.catalog[movie_id]) for movie_id in movie_ids)]
+        self.db.connection().executemany("INSERT INTO movies (id, name, genre, year) VALUES (?, ?, ?, ?)", rows)
+        if movie_ids:
+            self.max_id = max(self.max_id, max(movie_ids))
+        self.generation += 1
+
+    # Nothing to compact: there are no malformed rows
+    def rewrite(self):
+        pass
+
+    def start_compactor(self, interval, compact):
+        pass
+
+    def close(self):
+        pass
+
+
+# TodoStore over the todos table. Ids are row ids, so they are unique across users.
+class SQLiteTodoStore:
+    def __init__(self, db, username):
+        self.db = db
+        self.username = username
+
+    def add(self, task, deadline):
+        cursor = self.db.connection().execute(
+            "INSERT INTO todos (username, task, deadline) VALUES (?, ?, ?)", (self.username, task, deadline),
+        )
+        return cursor.lastrowid
+
+    def get(self, task_id):
+        row = self.db.connection().execute(
+            "SELECT task, deadline FROM todos WHERE id = ? AND username = ? AND completed_on IS NULL",
+            (task_id, self.username),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    # Mark a task done; raises KeyError if it is not an open task of this user
+    def complete(self, task_id, completion_date):
+        with self.db.transaction() as connection:
+            row = connection.execute(
+                "SELECT task, deadline FROM todos WHERE id = ? AND username = ? AND completed_on IS NULL",
+                (task_id, self.username),
+            ).fetchone()
+            if row is None:
+                raise KeyError(task_id)
+            connection.execute("UPDATE todos SET completed_on = ? WHERE id = ?", (completion_date, task_id))
+        return tuple(row)
+
+    def compact(self):
+        pass
+
+    def list(self):
+        return [tuple(row) for row in self.db.connection().execute(
+            "SELECT id, task, deadline FROM todos WHERE username = ? AND completed_on IS NULL ORDER BY id",
+            (self.username,),
+        )]
+
+    def next_due(self):
+        row = self.db.connection().execute(
+            "SELECT id, task, deadline FROM todos WHERE username = ? AND completed_on IS NULL"
+            " ORDER BY deadline, id LIMIT 1",
+            (self.username,),
+        ).fetchone()
+        return tuple(row) if row else None
+
+
+# LogWriter that batches entries into the logs table instead of files. Events
+# are keyed by (username, kind); each batch is one transaction on the writer
+# thread's own connection. Every line gets its own row, as in the text files.
+class SQLiteLogWriter(LogWriter):
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+
+    def _write_lines(self, key, lines):
+        username, kind = key
+        try:
+            with self.db.transaction() as connection:
+                connection.executemany("INSERT INTO logs (username, kind, entry, ts) VALUES (?, ?, ?, ?)",
+                                       [(username, kind, line, line_timestamp(line)) for text in lines
+                                        for line in text.splitlines(keepends=True)])
+        except sqlite3.Error as e:
+            raise OSError(str(e)) from e
+
+    def _shutdown(self):
+        pass
@@ -0,0 +1,128 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from movie_persistence import parse_movie_line
+
+SHARED_USER = "shared"
+
+
+# One app instance: registers its own and contested usernames, adds movies
+# (with a full rewrite every few), and writes to-do tasks and log lines for a
+# user every worker shares. Reports what it believes it wrote.
+def worker(index, workdir, options, start, results):
+    os.chdir(workdir)
+    # The checks below read the flat files directly
+    os.environ["APP_STORAGE"] = "text"
+    import main
+    main.credential_store.iterations = 1_000
+
+    start.wait()
+    registered = []
+    for j in range(options.users):
+        username = f"w{index}-u{j}"
+        if main.create_account(username, "password"):
+            registered.append(username)
+    contested = [f"contested{j}" for j in range(options.users)
+                 if main.create_account(f"contested{j}", "password")]
+
+    for j in range(options.movies):
+        main.add_movie_record(f"W{index} Movie {j}", "Drama", 2000 + j % 25)
+        if j % 10 == 9:
+            main.save_movies_to_file()
+
+    store = main.get_todo_store(SHARED_USER)
+    task_ids = [store.add(f"w{index} task {j}", f"2026-{1 + j % 12:02d}-01") for j in range(options.tasks)]
+    completed = task_ids[::3]
+    for task_id in completed:
+        store.complete(task_id, "2026-10-18 00:00:00")
+
+    for j in range(options.tasks):
+        main.log_user_interaction(SHARED_USER, f"worker {index} event {j}")
+
+    main.storage.close()
+    results.put({"index": index, "registered": registered, "contested": contested,
+                 "tasks": len(task_ids), "completed": len(completed)})
+
+
+def check(workdir, options, reports):
+    failures = []
+
+    with open(os.path.join(workdir, "user_credentials.txt")) as f:
+        names = Counter(line.split(",", 1)[0] for line in f if line.strip())
+    expected = {f"w{i}-u{j}" for i in range(options.workers) for j in range(options.users)}
+    missing = expected - set(names)
+    if missing:
+        failures.append(f"{len(missing)} registered users missing from user_credentials.txt")
+    duplicated = [name for name, count in names.items() if count > 1]
+    if duplicated:
+        failures.append(f"{len(duplicated)} usernames stored more than once, e.g. {duplicated[0]}")
+    winners = Counter(name for report in reports for name in report["contested"])
+    if any(count != 1 for count in winners.values()) or len(winners) != options.users:
+        failures.append("contested usernames were not each won by exactly one worker")
+
+    with open(os.path.join(workdir, "listmovie.txt")) as f:
+        movies = Counter(movie[0] for movie in map(parse_movie_line, f) if movie)
+    expected = {f"W{i} Movie {j}" for i in range(options.workers) for j in range(options.movies)}
+    if expected - set(movies):
+        failures.append(f"{len(expected - set(movies))} movies lost from listmovie.txt")
+    if any(count > 1 for count in movies.values()):
+        failures.append("some movies were written more than once")
+
+    from todo_store import TodoStore
+    folder = os.path.join(workdir, "user_logs", SHARED_USER)
+    store = TodoStore(os.path.join(folder, "todo_list.txt"), os.path.join(folder, "completed_task.txt"))
+    added = sum(report["tasks"] for report in reports)
+    completed = sum(report["completed"] for report in reports)
+    if len(store.tasks) != added - completed:
+        failures.append(f"{len(store.tasks)} open tasks, expected {added - completed}")
+    with open(os.path.join(folder, "completed_task.txt")) as f:
+        if sum(1 for _ in f) != completed:
+            failures.append("completed_task.txt does not hold every completed task")
+
+    from log_rotation import LogHistory
+    events = sum(1 for line in LogHistory(os.path.join(folder, "user_log.txt")).lines() if " event " in line)
+    if events != options.workers * options.tasks:
+        failures.append(f"{events} shared log lines, expected {options.workers * options.tasks}")
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run N writer processes against one data directory "
+                                                 "and check that nothing was lost or duplicated.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20, help="own and contested registrations per worker")
+    parser.add_argument("--movies", type=int, default=100, help="movies added per worker")
+    parser.add_argument("--tasks", type=int, default=50, help="shared to-do tasks and log lines per worker")
+    options = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stress_writers_")
+    os.makedirs(os.path.join(workdir, "user_logs", SHARED_USER))
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(i, workdir, options, start, results))
+                 for i in range(options.workers)]
+    for process in processes:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - began
+
+    failures = check(workdir, options, reports)
+    print(f"{options.workers} workers finished in {elapsed:.2f}s; data in {workdir}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures or any(process.exitcode for process in processes):
+        sys.exit(1)
+    print("OK: nothing lost or duplicated")
@@ -0,0 +1,142 @@
+import heapq
+import threading
+
+from file_lock import TailReader, locked
+from movie_persistence import atomic_write_lines
+
+TODO_HEADER = "To-Do List (incomplete tasks)\n"
+COMPACT_MIN_TOMBSTONES = 32
+
+
+# Per-user to-do list kept in memory and backed by an append-only todo_list.txt.
+#   task:      "<task> | Deadline: <date> | Status: Incomplete | Id: <id>"
+#   tombstone: "Id: <id> | Status: Completed"
+# Older task lines without an Id get ids in file order when loaded. Completing a
+# task appends a tombstone; the file is rewritten only when tombstones outnumber
+# live tasks. A heap ordered by deadline answers "next due" without sorting.
+# Several processes may serve the same user: every change is made under an
+# exclusive file lock after reading what the others appended, so ids stay unique
+# and a compaction never drops another process's tasks.
+class TodoStore:
+    def __init__(self, todo_path, completed_path):
+        self.todo_path = todo_path
+        self.completed_path = completed_path
+        self.tasks = {}
+        self.deadlines = []
+        self.next_id = 1
+        self.tombstones = 0
+        self.lock = threading.Lock()
+        self.tail = TailReader(todo_path)
+        self.load()
+
+    def load(self):
+        self.tail = TailReader(self.todo_path)
+        self._catch_up()
+
+    # Apply lines appended (by any process) since the last read
+    def _catch_up(self):
+        with locked(self.todo_path, shared=True):
+            reset, lines = self.tail.read_new()
+        if reset:
+            self.tasks = {}
+            self.deadlines = []
+            self.next_id = 1
+            self.tombstones = 0
+        for line in lines:
+            try:
+                self._load_line(line)
+            except ValueError:
+                continue
+
+    def _load_line(self, line):
+        if line.startswith("Id: ") and line.endswith(" | Status: Completed"):
+            task_id = int(line[4:line.index(" | ")])
+            self.tasks.pop(task_id, None)
+            self.tombstones += 1
+            return
+        if " | Deadline: " not in line:
+            return
+
+        task_id = None
+        if " | Id: " in line:
+            line, task_id = line.rsplit(" | Id: ", 1)
+            task_id = int(task_id)
+        task, rest = line.split(" | Deadline: ", 1)
+        deadline, _, status = rest.partition(" | Status: ")
+        if task_id is None:
+            task_id = self.next_id
+        self.next_id = max(self.next_id, task_id + 1)
+        if status != "Completed":
+            self._remember(task_id, task, deadline)
+
+    def _remember(self, task_id, task, deadline):
+        self.tasks[task_id] = (task, deadline)
+        heapq.heappush(self.deadlines, (deadline, task_id))
+
+    def _append(self, path, line):
+        with open(path, "a") as f:
+            f.write(line)
+
+    # Add an incomplete task and return its id
+    def add(self, task, deadline):
+        with self.lock, locked(self.todo_path):
+            self._catch_up()
+            task_id = self.next_id
+            self.next_id += 1
+            self._append(self.todo_path, f"{task} | Deadline: {deadline} | Status: Incomplete | Id: {task_id}\n")
+            self.tail.advance()
+            self._remember(task_id, task, deadline)
+        return task_id
+
+    # Mark a task done: tombstone in todo_list.txt, record in completed_task.txt
+    def complete(self, task_id, completion_date):
+        with self.lock, locked(self.todo_path):
+            self._catch_up()
+            task, deadline = self.tasks.pop(task_id)
+            self._append(self.todo_path, f"Id: {task_id} | Status: Completed\n")
+            self.tail.advance()
+            self._append(self.completed_path, f"{task} | Deadline: {deadline} | Completed on: {completion_date}\n")
+            self.tombstones += 1
+            if self.tombstones >= COMPACT_MIN_TOMBSTONES and self.tombstones > len(self.tasks):
+                self._compact()
+        return task, deadline
+
+    # Rewrite todo_list.txt with only the live tasks, keeping their ids
+    def compact(self):
+        with self.lock, locked(self.todo_path):
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        lines = [TODO_HEADER] + [
+            f"{task} | Deadline: {deadline} | Status: Incomplete | Id: {task_id}\n"
+            for task_id, (task, deadline) in self.tasks.items()
+        ]
+        atomic_write_lines(self.todo_path, lines)
+        self.tail.advance()
+        self.tombstones = 0
+        self.deadlines = [(deadline, task_id) for task_id, (_, deadline) in self.tasks.items()]
+        heapq.heapify(self.deadlines)
+
+    # (task, deadline) of a live task, or None
+    def get(self, task_id):
+        with self.lock:
+            self._catch_up()
+        return self.tasks.get(task_id)
+
+    # Live tasks as (id, task, deadline) in the order they were added
+    def list(self):
+        with self.lock:
+            self._catch_up()
+        return [(task_id, task, deadline) for task_id, (task, deadline) in self.tasks.items()]
+
+    # The incomplete task with the earliest deadline, or None
+    def next_due(self):
+        with self.lock:
+            self._catch_up()
+            while self.deadlines and self.deadlines[0][1] not in self.tasks:
+                heapq.heappop(self.deadlines)
+            if not self.deadlines:
+                return None
+            deadline, task_id = self.deadlines[0]
+            return task_id, self.tasks[task_id][0], deadline